@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0025_ordermodel_city_ordermodel_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordermodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
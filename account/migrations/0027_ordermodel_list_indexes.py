@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0026_ordermodel_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+        ),
+    ]
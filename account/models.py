@@ -91,6 +91,15 @@ class OrderModel(models.Model):
 
     whatsapp_to = models.CharField(max_length=32, blank=True, default="")  # e.g. "2126XXXXXXXX" (no '+')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # OrdersListView keyset pages on (created_at, id), newest first (scanned backwards)
+            models.Index(fields=["created_at", "id"], name="order_created_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_idx"),
+            models.Index(fields=["status", "created_at", "id"], name="order_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} — {self.user.username if self.user_id else 'guest'}"
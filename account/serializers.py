@@ -47,6 +47,13 @@ class AllOrdersListSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class OrderListSerializer(serializers.ModelSerializer):
+    """Order rows for paged lists: everything but the `items` JSON (?include=items adds it)."""
+    class Meta:
+        model = OrderModel
+        exclude = ["items"]
+
+
 # ----- NEW: creation serializer for COD orders -----
 class OrderCODCreateSerializer(serializers.ModelSerializer):
     class Meta:
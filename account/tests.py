@@ -1,14 +1,21 @@
 from account import views
+from datetime import timedelta
+from decimal import Decimal
 from django.http import response
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.utils import timezone
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from rest_framework.test import APITestCase
 from rest_framework.test import force_authenticate
 from rest_framework.test import APIRequestFactory
 from django.contrib.auth.models import User
 from rest_framework.test import force_authenticate
+from my_project.pagination import encode_cursor
 from .models import BillingAddress, OrderModel, StripeModel
+from product.models import Product, ShippingRate
 from .views import CardsListView, ChangeOrderStatus, CreateUserAddressView, DeleteUserAddressView, OrdersListView, UpdateUserAddressView, UserAccountDeleteView, UserAccountDetailsView, UserAccountUpdateView, UserAddressDetailsView, UserAddressesListView
 
 
@@ -389,3 +396,150 @@ class AccountApisAuthTest(AccountApisSetUp):
     def test_fetching_of_user_stripe_card_when_logged_out(self):
         response = self.client.get('/account/stripe-cards/')
         self.assertEqual(response.status_code, 401) # Unauthorized
+
+
+class OrdersListConditionalTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="buyer1234")
+        self.order = OrderModel.objects.create(name="buyer", user=self.user, total_price="120.00")
+
+    def test_orders_list_etag_tracks_status_changes(self):
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(reverse("orders_list"))["ETag"]
+        self.assertEqual(
+            self.client.get(reverse("orders_list"), HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        self.order.status = "SHIPPED"
+        self.order.save()
+        self.assertEqual(
+            self.client.get(reverse("orders_list"), HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+
+class CODOrderPricingTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="buyer1234")
+        self.product = Product.objects.create(name="Crème X", price="89.90", stock=True)
+        ShippingRate.objects.create(city="Casablanca", price=20)
+
+    def order(self, **extra):
+        self.client.force_authenticate(self.user)
+        return self.client.post(reverse("create_cod_order"), {
+            "items": [{"id": self.product.id, "name": "Crème X", "qty": 2, "price": 1}],
+            "total_price": 2,
+            "phone": "0600000000",
+            "address": "1 rue Test",
+            "city": "casablanca",
+            **extra,
+        }, format="json")
+
+    def test_cod_order_is_priced_server_side(self):
+        response = self.order()
+        self.assertEqual(response.status_code, 201)
+        order = OrderModel.objects.get()
+        self.assertEqual(order.total_price, Decimal("199.80"))
+        self.assertEqual(order.items[0]["price"], "89.90")
+        self.assertEqual(order.items[0]["qty"], 2)
+
+    def test_unknown_city_is_rejected(self):
+        self.assertEqual(self.order(city="Atlantis").status_code, 400)
+        self.assertFalse(OrderModel.objects.exists())
+
+    def test_non_object_body_is_rejected(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post(reverse("create_cod_order"), [1], format="json").status_code, 400)
+
+
+class OrdersListPaginationTest(APITestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", password="staff1234", is_staff=True)
+        self.buyer = User.objects.create_user(username="buyer", password="buyer1234")
+        self.orders = [
+            OrderModel.objects.create(
+                name="buyer", user=self.buyer if i % 2 else None, total_price="10.00",
+                status="SHIPPED" if i % 3 == 0 else "PENDING", city="Fès" if i < 4 else "Rabat",
+                payment_method="CARD" if i == 5 else "COD", items=[{"name": "Savon", "qty": 1}],
+            )
+            for i in range(7)
+        ]
+        # same timestamp for the first three: the cursor must break ties on id
+        OrderModel.objects.filter(pk__in=[o.pk for o in self.orders[:3]]).update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+
+    def ids(self, **params):
+        return [o["id"] for o in self.client.get(reverse("orders_list"), params).json()]
+
+    def test_keyset_pages_cover_every_order_once(self):
+        self.client.force_authenticate(self.staff)
+        seen, after = [], None
+        while True:
+            params = {"limit": 2, **({"after": after} if after else {})}
+            data = self.client.get(reverse("orders_list"), params).json()
+            self.assertNotIn("items", data["results"][0])
+            seen += [o["id"] for o in data["results"]]
+            after = data["next"]
+            if not after:
+                break
+        self.assertEqual(seen, self.ids())
+        self.assertEqual(sorted(seen), sorted(o.pk for o in self.orders))
+
+        data = self.client.get(reverse("orders_list"), {"limit": 1, "include": "items"}).json()
+        self.assertEqual(data["results"][0]["items"], [{"name": "Savon", "qty": 1}])
+        self.assertEqual(self.client.get(reverse("orders_list"), {"after": "junk"}).status_code, 400)
+        tampered = encode_cursor(("-created_at", "-id"), ["not a date", 1])
+        self.assertEqual(self.client.get(reverse("orders_list"), {"after": tampered}).status_code, 400)
+
+    def test_filters(self):
+        self.client.force_authenticate(self.staff)
+        o = self.orders
+        self.assertEqual(set(self.ids(status="shipped")), {o[0].pk, o[3].pk, o[6].pk})
+        self.assertEqual(self.ids(payment_method="CARD"), [o[5].pk])
+        self.assertEqual(set(self.ids(city="rabat", status="PENDING,SHIPPED")), {o[4].pk, o[5].pk, o[6].pk})
+        recent = (timezone.now() - timedelta(days=1)).date().isoformat()
+        self.assertEqual(set(self.ids(date_from=recent)), {x.pk for x in o[3:]})
+        self.assertEqual(set(self.ids(date_to=recent)), {x.pk for x in o[:3]})
+        self.assertEqual(self.client.get(reverse("orders_list"), {"date_from": "yesterday"}).status_code, 400)
+
+    def test_pages_validate_their_own_rows(self):
+        self.client.force_authenticate(self.staff)
+        url = reverse("orders_list")
+        with CaptureQueriesContext(connection) as ctx:
+            first = self.client.get(url, {"limit": 2})
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
+        self.assertEqual(self.client.get(url, {"limit": 2}, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        newest = OrderModel.objects.get(pk=first.json()["results"][0]["id"])
+        newest.status = "DELIVERED"
+        newest.save()
+        self.assertEqual(self.client.get(url, {"limit": 2}, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_customers_only_page_through_their_orders(self):
+        self.client.force_authenticate(self.buyer)
+        data = self.client.get(reverse("orders_list"), {"limit": 10}).json()
+        self.assertEqual({r["id"] for r in data["results"]}, {o.pk for o in self.orders if o.user_id})
+
+
+class OrdersListStreamingTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="buyer1234")
+        for i in range(5):
+            OrderModel.objects.create(
+                name="buyer", user=self.user, total_price=f"{10 + i}.00", city="Fès",
+                items=[{"name": "Crème « été »", "qty": i}],
+            )
+
+    def test_streamed_body_matches_buffered_body(self):
+        self.client.force_authenticate(self.user)
+        buffered = self.client.get(reverse("orders_list"))
+        self.assertFalse(buffered.streaming)
+        with override_settings(STREAMING_LIST_CHUNK_SIZE=2):
+            streamed = self.client.get(reverse("orders_list"))
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed["Content-Type"], "application/json")
+        self.assertEqual(b"".join(streamed.streaming_content), buffered.content)
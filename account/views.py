@@ -1,11 +1,17 @@
 # account/views.py
+from datetime import datetime, time, timedelta
+
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password, check_password
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
 
 from rest_framework import status, permissions
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -13,6 +19,11 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from my_project.conditional import conditional_on, page_etag
+from my_project.pagination import InvalidCursor, keyset_page, parse_limit
+from my_project.streaming import list_response
+from product.pricing import order_items, quote
+
 # Google token verification
 from google.oauth2 import id_token as google_id_token
 from google.auth.transport import requests as google_requests
@@ -32,6 +43,7 @@ from .serializers import (
     BillingAddressSerializer,
     AllOrdersListSerializer,
     OrderCODCreateSerializer,
+    OrderListSerializer,
 )
 
 
@@ -313,16 +325,89 @@ class DeleteUserAddressView(APIView):
 # ============================================================
 # Orders list & change status
 # ============================================================
+def _visible_orders(user):
+    if user.is_staff:
+        return OrderModel.objects.all()
+    return OrderModel.objects.filter(user=user)
+
+
+def _parse_bound(raw, end=False):
+    """
+    '2026-10-01' or an ISO datetime → aware datetime. A date `end` bound
+    becomes the next midnight, so ?date_to=<day> includes that whole day.
+    """
+    try:
+        value = parse_datetime(raw)
+        if value is None:
+            day = parse_date(raw)
+            if day is None:
+                raise ValueError(raw)
+            value = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    except ValueError:
+        raise ParseError(f"Invalid date: {raw}")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _filter_orders(qs, params):
+    """?status=, ?payment_method= (comma-separated), ?city=, ?date_from= / ?date_to= on created_at."""
+    for param in ("status", "payment_method"):
+        values = [v.strip().upper() for v in (params.get(param) or "").split(",") if v.strip()]
+        if values:
+            qs = qs.filter(**{f"{param}__in": values})
+    city = (params.get("city") or "").strip()
+    if city:
+        qs = qs.filter(city__iexact=city)
+    if params.get("date_from"):
+        qs = qs.filter(created_at__gte=_parse_bound(params["date_from"]))
+    if params.get("date_to"):
+        qs = qs.filter(created_at__lt=_parse_bound(params["date_to"], end=True))
+    return qs
+
+
+def _orders_page_limit(params):
+    """?limit= (default 50 once ?after= is given) → page size, or None for the full list."""
+    return parse_limit(params.get("limit") or ("50" if params.get("after") else None), default=50, maximum=200)
+
+
 class OrdersListView(APIView):
+    """
+    GET /api/account/orders/   (staff: every order, customers: their own), newest first
+    Filters: ?status=PENDING,SHIPPED&payment_method=COD&city=Fès&date_from=2026-10-01&date_to=2026-10-31
+    Cursor mode (opt-in): ?limit=50&after=<next> → {"results": [...], "next": "<cursor>"|null};
+    rows leave out `items` unless ?include=items. A page's ETag hashes its own
+    rows, so validating it never aggregates over the whole (filtered) table.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ("-created_at", "-id")
 
+    @conditional_on(
+        lambda request: None if _orders_page_limit(request.query_params)
+        else _filter_orders(_visible_orders(request.user), request.query_params)
+    )
     def get(self, request):
-        if request.user.is_staff:
-            orders = OrderModel.objects.all().order_by("-created_at")
+        orders = _filter_orders(_visible_orders(request.user), request.query_params)
+        limit = _orders_page_limit(request.query_params)
+        if limit is None:
+            return list_response(request, orders.order_by(*self.ordering), AllOrdersListSerializer)
+
+        serializer_class = OrderListSerializer
+        if "items" in (request.query_params.get("include") or "").split(","):
+            serializer_class = AllOrdersListSerializer
         else:
-            orders = OrderModel.objects.filter(user=request.user).order_by("-created_at")
-        serializer = AllOrdersListSerializer(orders, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            orders = orders.defer("items")
+        try:
+            rows, next_cursor = keyset_page(orders, self.ordering, limit, request.query_params.get("after"))
+        except InvalidCursor:
+            return Response({"detail": "Invalid cursor."}, status=400)
+
+        etag = page_etag(rows, next_cursor)
+        response = get_conditional_response(request, etag=etag) or Response(
+            {"results": serializer_class(rows, many=True).data, "next": next_cursor}, status=200
+        )
+        response["ETag"] = etag
+        return response
 
 
 class ChangeOrderStatus(APIView):
@@ -430,19 +515,28 @@ class CreateCODOrderView(APIView):
     POST /account/orders/cod/
     Body:
     {
-      "items": [{ "id":1, "name":"Crème X", "qty":2, "price":89.9 }],
-      "total_price": 179.8,
+      "items": [{ "product_id":1, "variant_id":4, "qty":2 }],
       "customer_name": "Nom Prénom",
       "phone": "06XXXXXXXX",
       "address": "Adresse complète",
       "city": "Casablanca",
       "notes": "Optionnel"
     }
+    Prices, shipping and total_price are computed server-side (product.pricing.quote);
+    client-sent prices are ignored.
     """
     permission_classes = [permissions.IsAuthenticated]  # change to AllowAny to allow guest orders
 
     def post(self, request):
-        serializer = OrderCODCreateSerializer(data=request.data)
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Expected a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            q = quote(request.data.get("items"), request.data.get("city"), require_shipping=True)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {**request.data, "items": order_items(q), "total_price": q["total"]}
+        serializer = OrderCODCreateSerializer(data=data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -0,0 +1,57 @@
+# my_project/conditional.py
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+def collection_validators(qs, fields=("updated_at",)):
+    """
+    (etag, last_modified) for a list resource from one cheap aggregate:
+    COUNT(*) catches deletes, MAX(<timestamp>) catches inserts and updates.
+    """
+    agg = qs.order_by().aggregate(
+        n=Count("pk"), **{f"last{i}": Max(f) for i, f in enumerate(fields)}
+    )
+    stamps = [agg[f"last{i}"] for i in range(len(fields))]
+    raw = ":".join([str(agg["n"])] + [s.isoformat() if s else "-" for s in stamps])
+    last = max((s for s in stamps if s), default=None)
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"', last
+
+
+def page_etag(rows, next_cursor):
+    """ETag of one keyset page: its rows' (pk, updated_at) plus the next cursor."""
+    raw = ",".join(f"{r.pk}:{r.updated_at.isoformat()}" for r in rows) + f"|{next_cursor}"
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def conditional_on(get_queryset, *fields, last_modified=False):
+    """
+    Decorates an APIView.get so unchanged resources answer 304 before the
+    view queries or serializes anything. `get_queryset(request, *args, **kwargs)`
+    returns the rows the response is built from.
+
+    Last-Modified is opt-in: a MAX() can't see a deleted row, so on lists only
+    the ETag (which includes the count) is a safe validator.
+
+    `get_queryset` may return None to skip the aggregate for that request
+    (e.g. keyset pages, which validate their own rows).
+    """
+    def validators(request, *args, **kwargs):
+        # etag_func and last_modified_func share one aggregate per request
+        if not hasattr(request, "_conditional_validators"):
+            qs = get_queryset(request, *args, **kwargs)
+            request._conditional_validators = (
+                (None, None) if qs is None else collection_validators(qs, fields or ("updated_at",))
+            )
+        return request._conditional_validators
+
+    return method_decorator(
+        condition(
+            etag_func=lambda request, *a, **kw: validators(request, *a, **kw)[0],
+            last_modified_func=(
+                (lambda request, *a, **kw: validators(request, *a, **kw)[1]) if last_modified else None
+            ),
+        )
+    )
@@ -0,0 +1,145 @@
+# my_project/media.py
+"""
+Uploaded media (/images/...).
+
+MEDIA_SERVE_MODE:
+  "accel"    → empty response + X-Accel-Redirect: nginx streams the file
+               (needs an `internal` location mapping MEDIA_ACCEL_PREFIX to MEDIA_ROOT)
+  "sendfile" → X-Sendfile with the absolute path (Apache mod_xsendfile, lighttpd)
+  "python"   → streamed here, with ETag/Last-Modified/304, single byte ranges
+               and precompressed .br/.gz siblings
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+# e.g. serum.3f2a9c01de.400.webp (product/images.py) or app.5d41402abc4b.css
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{8,}\.")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=3600"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _cache_control(path):
+    return IMMUTABLE if HASHED_NAME_RE.search(os.path.basename(path)) else REVALIDATE
+
+
+def _resolve(path):
+    try:
+        full = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:  # path escapes MEDIA_ROOT
+        raise Http404
+    if not os.path.isfile(full):
+        raise Http404
+    return full
+
+
+def _precompressed(request, full):
+    accepted = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(full + suffix):
+            return full + suffix, encoding
+    return full, None
+
+
+def _byte_range(header, size):
+    """(start, end) inclusive for a single satisfiable range, None to ignore, False if unsatisfiable."""
+    m = RANGE_RE.match(header.strip())
+    if not m or not any(m.groups()):
+        return None  # malformed or multi-range: send the whole file
+    first, last = m.groups()
+    if first:
+        start, end = int(first), (int(last) if last else size - 1)
+    else:  # suffix range: last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _read_range(fh, start, length):
+    try:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def serve_media(request, path):
+    full = _resolve(path)
+    content_type = mimetypes.guess_type(full)[0] or "application/octet-stream"
+    mode = getattr(settings, "MEDIA_SERVE_MODE", "python")
+
+    if mode == "accel":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + quote(path)
+        response["Cache-Control"] = _cache_control(path)
+        return response
+    if mode == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full
+        response["Cache-Control"] = _cache_control(path)
+        return response
+
+    source, encoding = _precompressed(request, full)
+    stat = os.stat(source)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": _cache_control(path),
+        "Accept-Ranges": "none" if encoding else "bytes",
+        "Vary": "Accept-Encoding",
+    }
+    if not_modified is not None:
+        for k, v in headers.items():
+            not_modified[k] = v
+        return not_modified
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and not encoding:
+        # If-Range: only honour the range while the client's copy is current
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if not if_range or if_range == etag:
+            byte_range = _byte_range(range_header, stat.st_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(open(source, "rb"), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(
+            open(source, "rb"), content_type=content_type, filename=os.path.basename(full)
+        )
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    for k, v in headers.items():
+        response[k] = v
+    return response
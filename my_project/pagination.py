@@ -0,0 +1,97 @@
+# my_project/pagination.py
+import base64
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import GeneratedField, Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(ordering, values) -> str:
+    """Opaque token: urlsafe base64 of the sort keys and the last row's values."""
+    raw = json.dumps({"o": list(ordering), "v": list(values)}, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(ordering, token: str, fields=None):
+    """
+    The last row's sort values from `token`. With `fields` (one model field per
+    sort key) each value goes through field.to_python(), so a tampered value
+    is an InvalidCursor here rather than an error in the WHERE clause.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = data["v"]
+        if data["o"] != list(ordering) or len(values) != len(ordering):
+            raise InvalidCursor("cursor does not match ordering")
+        if fields is not None:
+            if None in values:
+                raise InvalidCursor("null sort value")
+            values = [field.to_python(v) for field, v in zip(fields, values)]
+        return values
+    except (ValueError, KeyError, TypeError, ValidationError) as e:
+        raise InvalidCursor(str(e) or "invalid cursor")
+
+
+def _sort_fields(qs, ordering):
+    """The field behind each sort key: an annotation's output_field or a model field."""
+    fields = []
+    for key in ordering:
+        name = key.lstrip("-")
+        annotation = qs.query.annotations.get(name)
+        field = annotation.output_field if annotation is not None else qs.model._meta.get_field(name)
+        if isinstance(field, GeneratedField):
+            field = field.output_field
+        fields.append(field)
+    return fields
+
+
+def _after_q(ordering, values) -> Q:
+    """
+    Row-value comparison "(k1, k2, ...) after (v1, v2, ...)" spelled out as
+    k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...  (lt for descending keys).
+    Sort keys must be NOT NULL and the last one unique (normally id).
+    """
+    clauses = []
+    for i, key in enumerate(ordering):
+        field = key.lstrip("-")
+        op = "lt" if key.startswith("-") else "gt"
+        eq = {k.lstrip("-"): v for k, v in zip(ordering[:i], values[:i])}
+        clauses.append(Q(**eq, **{f"{field}__{op}": values[i]}))
+    return reduce(lambda a, b: a | b, clauses)
+
+
+def keyset_page(qs, ordering, limit: int, after: str = None):
+    """
+    Returns (rows, next_cursor). Seeks past `after` with a WHERE on the sort
+    keys instead of OFFSET, so every page costs the same index range scan.
+    """
+    ordering = tuple(ordering)
+    qs = qs.order_by(*ordering)
+    if after:
+        qs = qs.filter(_after_q(ordering, decode_cursor(ordering, after, _sort_fields(qs, ordering))))
+
+    rows = list(qs[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    values = [getattr(last, key.lstrip("-")) for key in ordering]
+    return rows, encode_cursor(ordering, values)
+
+
+def parse_limit(raw, default: int = 24, maximum: int = 100):
+    """'?limit=' → int in [1, maximum]; None when absent (pagination is opt-in)."""
+    if raw in (None, ""):
+        return None
+    try:
+        n = int(raw)
+    except (TypeError, ValueError):
+        n = default
+    return max(1, min(n, maximum))
@@ -0,0 +1,80 @@
+# my_project/renderers.py
+"""
+Drop-in replacements for DRF's JSONRenderer / JSONParser backed by orjson
+when it is installed (plain DRF behaviour otherwise).
+
+The wire format is unchanged: compact separators, raw UTF-8, U+2028/U+2029
+escaped, ISO datetimes with "Z" for UTC, and every type orjson doesn't
+encode natively (Decimal, lazy strings, ...) goes through DRF's own
+JSONEncoder.default.
+Anything orjson refuses (ints over 64 bits, ?indent=4) falls back to the
+stdlib path, and so does any output with a float orjson spells differently
+from repr() (1e16 vs 1e+16, 0.00001 vs 1e-05). The one known difference:
+NaN/Infinity render as null, where the strict JSONRenderer raises
+ValueError. `python manage.py benchmark_json` compares the two.
+"""
+import codecs
+import re
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+_default = JSONEncoder().default
+# a number token (after [ , : or at the start) in exponent form, or below 1e-4:
+# where orjson and repr() disagree. Inside strings it only costs a fallback.
+_REPR_MISMATCH = re.compile(rb"(?:^|[:\[,])-?(?:[0-9]+(?:\.[0-9]+)?e|0\.0000)")
+_DIGITS = bytes.maketrans(b"123456789", b"000000000")
+
+
+def _float_mismatch(ret):
+    # C-speed substring checks first; the (slow) regex only runs on a candidate
+    if b"0e" not in ret.translate(_DIGITS) and b"0.0000" not in ret:
+        return False
+    return _REPR_MISMATCH.search(ret) is not None
+# OPT_UTC_Z: UTC datetimes as "...Z", like DRF's encoder
+_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if _float_mismatch(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        # same JavaScript-safe escaping as JSONRenderer
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        raw = stream.read()
+        encoding = get_encoding(parser_context or {})
+        if codecs.lookup(encoding).name != "utf-8":
+            raw = raw.decode(encoding).encode()
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+        # orjson also rejects integers beyond 64 bits: let the stdlib decide
+        try:
+            return json.loads(raw, parse_constant=json.strict_constant if self.strict else None)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
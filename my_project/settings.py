@@ -101,6 +101,32 @@ DATABASES = {
     )
 }
 
+# trigram / full-text lookups used by product search on Postgres
+if DATABASES["default"]["ENGINE"].endswith("postgresql"):
+    INSTALLED_APPS.append("django.contrib.postgres")
+
+# -----------------------------------------------------------------------------
+# CACHE
+# -----------------------------------------------------------------------------
+# Local memory per worker by default; set REDIS_URL to share it across workers
+REDIS_URL = os.environ.get("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+
+# catalog response cache (product/cache.py); bounds staleness across locmem workers
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", "300" if REDIS_URL else "60"))
+# streamed catalog lists bigger than this are served but not cached
+CATALOG_CACHE_MAX_BYTES = int(os.environ.get("CATALOG_CACHE_MAX_BYTES", str(1024 * 1024)))
+
 # -----------------------------------------------------------------------------
 # AUTH / JWT / DRF
 # -----------------------------------------------------------------------------
@@ -120,7 +146,19 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
+    # orjson-backed when installed, same output as DRF's JSONRenderer/JSONParser
+    "DEFAULT_RENDERER_CLASSES": (
+        "my_project.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "my_project.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
+# Lists longer than this are streamed chunk by chunk (my_project/streaming.py)
+STREAMING_LIST_CHUNK_SIZE = int(os.environ.get("DJANGO_STREAMING_LIST_CHUNK_SIZE", "500"))
 
 # -----------------------------------------------------------------------------
 # STATIC / MEDIA
@@ -136,6 +174,11 @@ MEDIA_URL = os.environ.get("DJANGO_MEDIA_URL", "/images/")
 _default_media_root = BASE_DIR / "media"
 MEDIA_ROOT = _P(os.environ.get("DJANGO_MEDIA_ROOT", str(_default_media_root)))
 
+# How /images/ is delivered (my_project/media.py): "python" | "accel" | "sendfile"
+MEDIA_SERVE_MODE = os.environ.get("DJANGO_MEDIA_SERVE_MODE", "python")
+# nginx `internal` location aliasing MEDIA_ROOT, used by the "accel" mode
+MEDIA_ACCEL_PREFIX = os.environ.get("DJANGO_MEDIA_ACCEL_PREFIX", "/_protected_media/")
+
 STORAGES = {
     "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
     "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
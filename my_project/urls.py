@@ -2,9 +2,9 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve as static_serve
 
 from my_project.health import health
+from my_project.media import serve_media
 from account.views import MyTokenObtainPairView
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -22,12 +22,8 @@ urlpatterns = [
     path('api/newsletter/', include('newsletter.urls')),
 
     path('health/', health),
- re_path(
-        r"^images/(?P<path>.+)$",
-        static_serve,
-        {"document_root": settings.MEDIA_ROOT, "show_indexes": False},
-        name="media",
-    ),
+    # uploads: X-Accel-Redirect / X-Sendfile in prod, streamed fallback otherwise
+    re_path(r"^images/(?P<path>.+)$", serve_media, name="media"),
 ] 
    
 
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+from product.search import fold
+
+
+def _key(city):
+    return " ".join(fold(city or "").split())
+
+
+def copy_rates_to_product(apps, schema_editor):
+    """
+    Moves payments' rates into product.ShippingRate. A city already there
+    (compared accent/case-insensitively) keeps the product table's row.
+    """
+    Old = apps.get_model("payments", "ShippingRate")
+    New = apps.get_model("product", "ShippingRate")
+    existing = {_key(city) for city in New.objects.values_list("city", flat=True)}
+    moved = []
+    for rate in Old.objects.order_by("-updated_at"):
+        key = _key(rate.city)
+        if key in existing:
+            continue
+        existing.add(key)
+        moved.append((rate, New.objects.create(city=rate.city.strip(), price=rate.price, active=rate.active)))
+    # created_at is auto_now_add on the product model: restore the original dates
+    for old, new in moved:
+        New.objects.filter(pk=new.pk).update(created_at=old.created_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_paymentorder_shippingrate_delete_order'),
+        ('product', '0026_shippingrate_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_rates_to_product, migrations.RunPython.noop),
+        migrations.DeleteModel(name='ShippingRate'),
+    ]
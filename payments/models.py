@@ -23,16 +23,7 @@ class PaymentOrder(models.Model):
         return f"Order #{self.pk} - {self.amount} {self.currency} - {self.status}"
 
 
-class ShippingRate(models.Model):
-    city   = models.CharField(max_length=120, unique=True)
-    price  = models.DecimalField(max_digits=8, decimal_places=2)
-    active = models.BooleanField(default=True)
-
-    created_at = models.DateTimeField(default=timezone.now)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    class Meta:
-        ordering = ["city"]
-
-    def __str__(self):
-        return f"{self.city} - {self.price} MAD"
+# Shipping rates live in one table, product.ShippingRate (read through
+# product/shipping.py); this app's own table was merged into it by
+# migration payments.0003.
+from product.models import ShippingRate  # noqa: E402,F401
@@ -1,3 +1,33 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from django.urls import reverse
+
+from product.models import Product, ShippingRate
+from .models import PaymentOrder
+
+
+class CreatePaymentPricingTest(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(name="Huile", price=200, new_price=150, stock=True)
+        ShippingRate.objects.create(city="Rabat", price=25)
+
+    def test_amount_ignores_client_prices(self):
+        response = self.client.post(reverse("payments-create"), {
+            "items": [{"product_id": self.product.id, "qty": 2, "price": 1}],
+            "shipping": {"city": "RABAT", "price": 0},
+            "method": "cod",
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        order = PaymentOrder.objects.get()
+        self.assertEqual(order.amount, Decimal("325.00"))
+        self.assertEqual(order.payload["shipping"], {"city": "RABAT", "price": "25.00"})
 
-# Create your tests here.
+    def test_items_without_product_are_rejected(self):
+        response = self.client.post(reverse("payments-create"), {
+            "items": [{"price": 199.0, "qty": 1}], "city": "Rabat",
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("payments-create"), [1], content_type="application/json")
+        self.assertEqual(response.status_code, 400)
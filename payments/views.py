@@ -7,6 +7,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status as http
 
+from product.pricing import order_items, quote
+from product.shipping import shipping_rates
+
 from .models import PaymentOrder, ShippingRate
 from .serializers import ShippingRateSerializer
 
@@ -53,17 +56,22 @@ class CreatePayment(APIView):
     """
     POST /api/payments/create/
     {
-      "items":    [{ "price": 199.0, "qty": 1 }, ...],
-      "shipping": { "price": 20 },
+      "items":    [{ "product_id": 1, "variant_id": 4, "qty": 1 }, ...],
+      "city":     "Casablanca",        (or "shipping": { "city": "Casablanca" })
       "email":    "client@email.com",
       "method":   "card" | "cod"   (optional, default: "card")
     }
 
+    The amount is priced server-side (product.pricing.quote): item prices and
+    the shipping rate come from the catalog, client-sent prices are ignored.
+
     - "card": simulate a bank page redirect to OK (replace later with real CMI HPP)
     - "cod" : returns frontend success URL immediately (order stays PENDING)
     """
     def post(self, request):
         data = request.data or {}
+        if not isinstance(data, dict):
+            return Response({"detail": "Payload invalide."}, status=http.HTTP_400_BAD_REQUEST)
         items = data.get("items") or []
         shipping = data.get("shipping") or {}
         email = data.get("email") or ""
@@ -72,12 +80,14 @@ class CreatePayment(APIView):
         if not items:
             return Response({"detail": "Aucun article."}, status=http.HTTP_400_BAD_REQUEST)
 
+        city = data.get("city") or (shipping.get("city") if isinstance(shipping, dict) else None)
         try:
-            total_items = sum(float(i.get("price", 0)) * int(i.get("qty", 1)) for i in items)
-            shipping_price = float(shipping.get("price", 0))
-            amount = round(total_items + shipping_price, 2)
-        except Exception:
-            return Response({"detail": "Payload invalide."}, status=http.HTTP_400_BAD_REQUEST)
+            q = quote(items, city, require_shipping=True)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=http.HTTP_400_BAD_REQUEST)
+        items = order_items(q)
+        shipping = {"city": q["city"], "price": str(q["shipping"])}
+        amount = q["total"]
 
         order = PaymentOrder.objects.create(
             amount=amount,
@@ -153,8 +163,8 @@ class ShippingRateListCreate(APIView):
         return [permissions.IsAdminUser()]
 
     def get(self, request):
-        qs = ShippingRate.objects.filter(active=True).order_by("city")
-        return Response(ShippingRateSerializer(qs, many=True).data, status=200)
+        rates = shipping_rates().rates  # in-process table, no query when warm
+        return Response(ShippingRateSerializer(rates, many=True).data, status=200)
 
     def post(self, request):
         data = request.data.copy()
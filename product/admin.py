@@ -1,10 +1,12 @@
-from decimal import Decimal, ROUND_HALF_UP
-from django.contrib import admin
-from .models import Product, ProductVariant, WishlistItem, ShippingRate
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from .models import Brand, Product, ProductVariant, WishlistItem, ShippingRate
 
 
-def _round_money(value):
-    return Decimal(value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+class DiscountActionForm(ActionForm):
+    percent = forms.IntegerField(min_value=1, max_value=99, required=False, label="%")
 
 
 @admin.register(Product)
@@ -21,32 +23,41 @@ class ProductAdmin(admin.ModelAdmin):
         "has_discount", "discount_percent",
     )
 
-    actions = ["discount_10", "discount_20", "discount_30", "clear_discount"]
+    # "Select all N products" + a list filter (brand, category) discounts the
+    # whole filtered set: actions run as one UPDATE, rows are never loaded
+    actions = ["discount_10", "discount_20", "discount_30", "discount_custom", "clear_discount"]
+    action_form = DiscountActionForm
 
-    def _apply_pct(self, queryset, pct: int):
-        for p in queryset:
-            if p.price and p.price > 0:
-                p.new_price = _round_money(Decimal(p.price) * Decimal(100 - pct) / Decimal(100))
-                p.save()
+    def _apply_pct(self, request, queryset, pct: int):
+        n = queryset.apply_discount(pct)
+        self.message_user(request, f"Applied {pct}% discount to {n} products.")
 
     def discount_10(self, request, queryset):
-        self._apply_pct(queryset, 10)
-        self.message_user(request, f"Applied 10% discount to {queryset.count()} products.")
-    discount_10.short_description = "Apply 10% discount (set new_price)"
+        self._apply_pct(request, queryset, 10)
+    discount_10.short_description = "Apply 10%% discount (set new_price)"
 
     def discount_20(self, request, queryset):
-        self._apply_pct(queryset, 20)
-        self.message_user(request, f"Applied 20% discount to {queryset.count()} products.")
-    discount_20.short_description = "Apply 20% discount (set new_price)"
+        self._apply_pct(request, queryset, 20)
+    discount_20.short_description = "Apply 20%% discount (set new_price)"
 
     def discount_30(self, request, queryset):
-        self._apply_pct(queryset, 30)
-        self.message_user(request, f"Applied 30% discount to {queryset.count()} products.")
-    discount_30.short_description = "Apply 30% discount (set new_price)"
+        self._apply_pct(request, queryset, 30)
+    discount_30.short_description = "Apply 30%% discount (set new_price)"
+
+    def discount_custom(self, request, queryset):
+        try:
+            pct = DiscountActionForm.base_fields["percent"].clean(request.POST.get("percent"))
+        except ValidationError:
+            pct = None
+        if not pct:
+            self.message_user(request, "Enter a percentage between 1 and 99.", messages.ERROR)
+            return
+        self._apply_pct(request, queryset, pct)
+    discount_custom.short_description = "Apply the %% entered (set new_price)"
 
     def clear_discount(self, request, queryset):
-        queryset.update(new_price=None)
-        self.message_user(request, f"Cleared discounts on {queryset.count()} products.")
+        n = queryset.clear_discount()
+        self.message_user(request, f"Cleared discounts on {n} products.")
     clear_discount.short_description = "Clear discount (unset new_price)"
 
 
@@ -69,3 +80,9 @@ class ShippingRateAdmin(admin.ModelAdmin):
     list_display = ("id", "city", "price", "active", "created_at")
     list_filter = ("active",)
     search_fields = ("city",)
+
+
+@admin.register(Brand)
+class BrandAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "key")
+    search_fields = ("name", "key")
@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'product'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .cache import bump_catalog_version
+        from .models import (
+            Brand, Product, ProductVariant, ShippingRate, WishlistItem,
+            delete_product_images, sync_product_brand, sync_variant_product,
+            wishlist_item_deleted, wishlist_item_saved,
+        )
+        from .search import index_product, unindex_product
+
+        post_save.connect(index_product, sender=Product, dispatch_uid="product-search-index")
+        post_delete.connect(unindex_product, sender=Product, dispatch_uid="product-search-unindex")
+        post_delete.connect(sync_product_brand, sender=Product, dispatch_uid="product-brand-delete")
+        post_delete.connect(delete_product_images, sender=Product, dispatch_uid="product-images-delete")
+        post_save.connect(wishlist_item_saved, sender=WishlistItem, dispatch_uid="wishlist-count-save")
+        post_delete.connect(wishlist_item_deleted, sender=WishlistItem, dispatch_uid="wishlist-count-delete")
+        post_save.connect(sync_variant_product, sender=ProductVariant, dispatch_uid="variant-promo-save")
+        post_delete.connect(sync_variant_product, sender=ProductVariant, dispatch_uid="variant-promo-delete")
+        for model in (Product, ProductVariant, ShippingRate, Brand):
+            post_save.connect(bump_catalog_version, sender=model, dispatch_uid=f"catalog-version-save-{model.__name__}")
+            post_delete.connect(bump_catalog_version, sender=model, dispatch_uid=f"catalog-version-delete-{model.__name__}")
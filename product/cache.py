@@ -0,0 +1,144 @@
+# product/cache.py
+"""
+Response cache for the public catalog endpoints.
+
+Entries are keyed on a catalog version stamp, so invalidation is a single
+counter bump: any write to Product / ProductVariant / ShippingRate (save,
+delete, queryset update/delete, bulk_create/bulk_update) calls
+bump_catalog_version(), and the old entries simply stop being read and
+expire.
+
+With the default LocMemCache each gunicorn worker has its own stamp, so a
+write is only seen immediately by the worker that made it; the others catch
+up within CATALOG_CACHE_TIMEOUT (cached responses expire, and the in-process
+snapshots below are reloaded after that long whatever the stamp says).
+Configure REDIS_URL for a shared cache.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+VERSION_KEY = "catalog:version"
+
+
+def catalog_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # fresh stamp (not 1) so a lost key can't resurrect stale entries
+        version = int(time.time() * 1000)
+        cache.add(VERSION_KEY, version, timeout=None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def snapshot_is_current(snapshot, version) -> bool:
+    """
+    For in-process snapshots (suggest index, shipping rates) carrying
+    `version` and a time.monotonic() `loaded_at`: current while the catalog
+    version is unchanged, for at most CATALOG_CACHE_TIMEOUT seconds.
+    """
+    return (
+        snapshot is not None
+        and snapshot.version == version
+        and time.monotonic() - snapshot.loaded_at < settings.CATALOG_CACHE_TIMEOUT
+    )
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def bump_catalog_version(*args, **kwargs):
+    """
+    Signal receiver and plain helper. Bumps now (this request's own reads) and
+    again after commit, so a concurrent read that cached pre-commit rows under
+    the intermediate stamp is dropped too.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def cache_key(view_name: str, kwargs: dict, params) -> str:
+    normalized = urlencode(sorted((k, v) for k in params for v in params.getlist(k)))
+    raw = f"{view_name}|{sorted(kwargs.items())}|{normalized}"
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"catalog:{catalog_version()}:{digest}"
+
+
+class CatalogCacheMixin:
+    """
+    Serves anonymous JSON GETs from the cache as pre-rendered bytes: a hit
+    never reaches the ORM, the serializers or the renderer.
+    """
+    def _cacheable(self, request):
+        return (
+            request.method == "GET"
+            and "HTTP_AUTHORIZATION" not in request.META
+            and "text/html" not in request.META.get("HTTP_ACCEPT", "")
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self._cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = cache_key(type(self).__name__, kwargs, request.GET)
+        hit = cache.get(key)
+        if hit is not None:
+            content, content_type, etag, last_modified = hit
+            # validators were stored with the body, so a 304 also skips the DB
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=parse_http_date_safe(last_modified or "")
+            )
+            response = not_modified or HttpResponse(content, content_type=content_type)
+            if etag:
+                response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = last_modified
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if response.streaming and response.get("Content-Type") == "application/json":
+            # long lists (my_project.streaming): cache the body once it has been sent
+            response.streaming_content = self._tee(key, response, response.streaming_content)
+            response["X-Cache"] = "MISS"
+        elif getattr(response, "accepted_media_type", "") == "application/json":
+            response.render()
+            self._store(key, response, response.content)
+            response["X-Cache"] = "MISS"
+        return response
+
+    def _store(self, key, response, content):
+        cache.set(
+            key,
+            (content, response["Content-Type"],
+             response.get("ETag"), response.get("Last-Modified")),
+            settings.CATALOG_CACHE_TIMEOUT,
+        )
+
+    def _tee(self, key, response, content):
+        # keep a copy only up to CATALOG_CACHE_MAX_BYTES: past that the body is
+        # just streamed, so memory stays bounded on big lists
+        chunks, size, limit = [], 0, settings.CATALOG_CACHE_MAX_BYTES
+        for chunk in content:
+            if chunks is not None:
+                size += len(chunk)
+                if size > limit:
+                    chunks = None  # too big to cache: drop what was kept
+                else:
+                    chunks.append(chunk)
+            yield chunk
+        if chunks is not None:
+            self._store(key, response, b"".join(chunks))
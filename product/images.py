@@ -0,0 +1,89 @@
+# product/images.py
+"""
+Resized derivatives of Product.image (WebP + JPEG at a few widths).
+
+Names embed a hash of the original's bytes, e.g.
+products/derived/serum.3f2a9c01de.400.webp, so a new upload never reuses a
+URL and the files can be served with far-future caching.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (200, 400, 800)
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+DERIVED_DIR = "products/derived"
+
+
+def _encode(img, fmt):
+    pil_format, options = FORMATS[fmt]
+    if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+        # JPEG has no alpha: flatten onto white
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.convert("RGBA").split()[-1])
+        img = background
+    buf = io.BytesIO()
+    img.save(buf, pil_format, **options)
+    return buf.getvalue()
+
+
+def build_derivatives(field):
+    """
+    Writes the derivatives of an ImageFieldFile and returns the manifest
+    {"400": {"webp": name, "jpeg": name}, ...}. Widths above the original's
+    are skipped (no upscaling); an unreadable image yields {}.
+    """
+    storage = field.storage
+    try:
+        with storage.open(field.name, "rb") as fh:
+            raw = fh.read()
+        original = ImageOps.exif_transpose(Image.open(io.BytesIO(raw)))
+        original.load()
+    except (OSError, UnidentifiedImageError) as e:
+        logger.warning("No derivatives for %s: %s", field.name, e)
+        return {}
+
+    if original.mode not in ("RGB", "RGBA", "L"):
+        original = original.convert("RGBA" if "transparency" in original.info else "RGB")
+
+    digest = hashlib.sha1(raw).hexdigest()[:10]
+    stem = posixpath.splitext(posixpath.basename(field.name))[0]
+    manifest = {}
+    for width in WIDTHS:
+        if width > original.width and manifest:
+            break
+        w = min(width, original.width)
+        h = max(1, round(original.height * w / original.width))
+        resized = original.resize((w, h), Image.LANCZOS)
+        entry = {}
+        for fmt in FORMATS:
+            name = f"{DERIVED_DIR}/{stem}.{digest}.{w}.{fmt}"
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(_encode(resized, fmt)))
+            entry[fmt] = name
+        manifest[str(w)] = entry
+    return manifest
+
+
+def delete_derivatives(storage, manifest, keep=()):
+    keep = {name for entry in (keep or {}).values() for name in entry.values()}
+    for entry in (manifest or {}).values():
+        for name in entry.values():
+            if name not in keep:
+                storage.delete(name)
+
+
+def derivative_urls(storage, manifest):
+    return {
+        width: {fmt: storage.url(name) for fmt, name in entry.items()}
+        for width, entry in (manifest or {}).items()
+    }
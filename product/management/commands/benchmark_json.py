@@ -0,0 +1,65 @@
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from my_project.renderers import FastJSONRenderer, orjson
+
+
+def _rows(n):
+    """Product-list-shaped rows: serialized strings plus raw Decimal/datetime/float ReadOnlyFields."""
+    now = timezone.now()
+    return [
+        {
+            "id": i,
+            "name": f"Sérum éclat n°{i}",
+            "description": "Hydrate et illumine le teint. " * 4,
+            "price": f"{100 + i % 50}.90",
+            "new_price": f"{80 + i % 50}.90" if i % 3 == 0 else None,
+            "stock": True,
+            "image": f"/images/products/serum-{i}.jpg",
+            "category": "face",
+            "brand": "Nuxe",
+            "has_discount": i % 3 == 0,
+            "discount_percent": 20 if i % 3 == 0 else 0,
+            "rating": round(3 + (i % 21) / 10, 1),
+            "promo_variant_id": i * 3 if i % 3 == 0 else None,
+            "promo_variant_old_price": Decimal("129.90") if i % 3 == 0 else None,
+            "promo_variant_new_price": f"{103 + i % 50}.92" if i % 3 == 0 else None,
+            "updated_at": now - timedelta(minutes=i),
+            "variants": [
+                {"id": i * 3 + k, "label": f"{50 * (k + 1)} ml", "size_ml": 50 * (k + 1),
+                 "price": f"{60 + 20 * k}.00", "in_stock": True, "sku": f"NX-{i}-{k}"}
+                for k in range(3)
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark: DRF's JSONRenderer vs FastJSONRenderer on a product-list payload."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        data = _rows(options["rows"])
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        if stock.render(data) != fast.render(data):
+            self.stderr.write(self.style.ERROR("Outputs differ: FastJSONRenderer changed the wire format."))
+            return
+
+        timings = {}
+        for label, renderer in (("JSONRenderer", stock), ("FastJSONRenderer", fast)):
+            best = min(timeit.repeat(lambda: renderer.render(data), number=1, repeat=options["repeat"]))
+            timings[label] = best
+            self.stdout.write(f"{label:<18} {best * 1000:8.2f} ms / {options['rows']} rows")
+
+        backend = "orjson " + orjson.__version__ if orjson else "stdlib json (orjson not installed)"
+        speedup = timings["JSONRenderer"] / timings["FastJSONRenderer"]
+        self.stdout.write(self.style.SUCCESS(f"Identical output; {speedup:.1f}x faster with {backend}."))
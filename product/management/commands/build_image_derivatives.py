@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from product.models import Product
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for product images that lack them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Rebuild every product, not only those with missing derivatives.",
+        )
+
+    def handle(self, *args, **options):
+        built = skipped = 0
+        qs = Product.objects.exclude(image="").exclude(image__isnull=True).only("id", "image", "image_derivatives")
+        for product in qs.iterator(chunk_size=200):
+            storage = product.image.storage
+            complete = product.image_derivatives and all(
+                storage.exists(name)
+                for entry in product.image_derivatives.values()
+                for name in entry.values()
+            )
+            if complete and not options["force"]:
+                skipped += 1
+                continue
+            product.refresh_image_derivatives()
+            if product.image_derivatives:
+                built += 1
+            else:
+                self.stderr.write(f"Product #{product.id}: could not read {product.image.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Built {built}, already complete {skipped}."))
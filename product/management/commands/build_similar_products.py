@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from product.similar import rebuild_similar, stale_product_ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the precomputed similar-products lists. By default only products that "
+        "changed, or were ordered/wishlisted, since their last build; --full rebuilds all "
+        "(run it periodically so neighbours of changed products are rescored too)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild every product.")
+
+    def handle(self, *args, **options):
+        if options["full"]:
+            n = rebuild_similar()
+        else:
+            stale = stale_product_ids()
+            n = rebuild_similar(stale) if stale else 0
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt similar products for {n} products."))
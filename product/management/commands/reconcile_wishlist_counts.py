@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from product.models import WishlistCount
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount every per-user WishlistCount from the WishlistItem rows, fixing any drift "
+        "left by raw SQL or data imports (safe to run periodically)."
+    )
+
+    def handle(self, *args, **options):
+        n = WishlistCount.objects.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Fixed {n} wishlist counters."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from product.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild every product's search_text (and the SQLite FTS index) from name, brand "
+        "and description — e.g. after writes made outside the ORM."
+    )
+
+    def handle(self, *args, **options):
+        n = Product.objects.all().reindex_search()
+        self.stdout.write(self.style.SUCCESS(f"Reindexed {n} products."))
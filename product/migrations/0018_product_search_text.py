@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:26
+
+from django.db import migrations, models
+
+from product.search import build_search_text
+
+
+def backfill_search_text(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    batch = []
+    for p in Product.objects.only("id", "name", "brand", "description").iterator():
+        p.search_text = build_search_text(p.name, p.brand, p.description)
+        batch.append(p)
+    Product.objects.bulk_update(batch, ["search_text"], batch_size=500)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS product_search_fts ON product_product "
+            "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_text, '')))"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS product_search_trgm ON product_product "
+            "USING gin (search_text gin_trgm_ops)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_search "
+            "USING fts5(search_text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_search_vocab "
+            "USING fts5vocab(product_search, 'row')"
+        )
+        schema_editor.execute(
+            "INSERT INTO product_search(rowid, search_text) "
+            "SELECT id, search_text FROM product_product"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS product_search_fts")
+        schema_editor.execute("DROP INDEX IF EXISTS product_search_trgm")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS product_search_vocab")
+        schema_editor.execute("DROP TABLE IF EXISTS product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0017_remove_product_old_price_product_new_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.CharField(choices=[('face', 'Visage'), ('lips', 'Lèvres'), ('eyes', 'Yeux'), ('eyebrow', 'Sourcils'), ('hair', 'Cheveux'), ('other', 'Other'), ('body', 'Corps'), ('packs', 'Packs'), ('acne', 'Acné'), ('hyper_pigmentation', 'Hyper pigmentation'), ('brightening', 'Éclaircissement'), ('dry_skin', 'Peau sèche'), ('combination_oily', 'Peau mixte/grasse')], db_index=True, default='other', max_length=30),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
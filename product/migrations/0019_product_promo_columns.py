@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:28
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+
+def backfill_promo_variant_price(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    batch = []
+    for p in Product.objects.filter(has_discount=True).prefetch_related("variants"):
+        vs = list(p.variants.all())
+        if not vs:
+            continue
+        with_size = [v for v in vs if v.size_ml not in (None, 0)]
+        v = max(with_size, key=lambda v: v.size_ml) if with_size else max(vs, key=lambda v: v.price)
+        pct = Decimal(p.discount_percent) / Decimal(100)
+        p.promo_variant_new_price = (v.price * (1 - pct)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        batch.append(p)
+    Product.objects.bulk_update(batch, ["promo_variant_new_price"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0018_product_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='discount_percent',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('new_price__gt', 0), ('new_price__lt', models.F('price'))), then=django.db.models.functions.comparison.Cast(django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('price'), '-', models.F('new_price')), '*', django.db.models.expressions.RawSQL('100.0', [], output_field=models.DecimalField())), '/', models.F('price'))), models.IntegerField())), default=models.Value(0)), output_field=models.IntegerField()),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='has_discount',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('new_price__gt', 0), ('new_price__lt', models.F('price'))), then=models.Value(True)), default=models.Value(False)), output_field=models.BooleanField()),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='promo_variant_new_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-discount_percent', '-id'], name='product_discount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('has_discount', True)), fields=['-id'], name='product_on_sale_idx'),
+        ),
+        migrations.RunPython(backfill_promo_variant_price, migrations.RunPython.noop),
+    ]
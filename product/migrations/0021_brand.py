@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:34
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def backfill_brands(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    Brand = apps.get_model("product", "Brand")
+    present = {}
+    for brand in Product.objects.exclude(brand="").order_by("id").values_list("brand", flat=True):
+        present.setdefault(brand.strip().lower(), brand.strip())
+    Brand.objects.bulk_create([Brand(key=k, name=n) for k, n in present.items() if k])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0020_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Brand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120)),
+                ('key', models.CharField(max_length=120, unique=True)),
+            ],
+            options={
+                'ordering': ['key'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.text.Lower('brand'), name='product_brand_lower_idx'),
+        ),
+        migrations.RunPython(backfill_brands, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:48
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def backfill_variant_price_range(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    ProductVariant = apps.get_model("product", "ProductVariant")
+    prices = ProductVariant.objects.filter(product=models.OuterRef("pk")).order_by().values("product")
+    Product.objects.update(
+        variant_min_price=models.Subquery(prices.annotate(p=models.Min("price")).values("p")),
+        variant_max_price=models.Subquery(prices.annotate(p=models.Max("price")).values("p")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0022_product_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_brand_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('new_price__gt', 0), ('new_price__lt', models.F('price'))), then=models.F('new_price')), default=models.F('price')), output_field=models.DecimalField(decimal_places=2, max_digits=8)),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='variant_max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='variant_min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.text.Lower('brand'), models.OrderBy(models.F('id'), descending=True), name='product_brand_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'effective_price', 'id'], name='product_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-id'], name='product_cat_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='product_name_idx'),
+        ),
+        migrations.RunPython(backfill_variant_price_range, migrations.RunPython.noop),
+    ]
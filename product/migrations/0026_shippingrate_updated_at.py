@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0025_wishlistcount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shippingrate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='shippingrate',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+    ]
@@ -1,7 +1,169 @@
 # product/models.py
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, Exists, F, Max, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Lower, Now, Round
+from django.db.models.lookups import GreaterThan, LessThan
 from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .cache import bump_catalog_version
+from .images import build_derivatives, delete_derivatives
+from .search import build_search_text, index_products
+
+# "100.0" stays a literal: numeric on Postgres, REAL on SQLite (no integer division)
+_HUNDRED = RawSQL("100.0", [], output_field=models.DecimalField())
+_ON_SALE = Q(new_price__gt=0, new_price__lt=F("price"))
+
+
+class CatalogQuerySet(models.QuerySet):
+    """Bulk writes bypass model signals, so they bump the catalog cache version here."""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if "brand" in kwargs and self.model is Product:
+            Brand.objects.rebuild()
+        bump_catalog_version()
+        return rows
+
+    def delete(self):
+        result = super().delete()
+        bump_catalog_version()
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_catalog_version()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        bump_catalog_version()
+        return rows
+
+
+# columns search_text is built from (see Product.save)
+_SEARCH_FIELDS = {"name", "brand", "description"}
+
+
+class ProductQuerySet(CatalogQuerySet):
+    """Bulk writes to name/brand/description also refresh search_text and the SQLite FTS rows."""
+
+    def update(self, **kwargs):
+        if _SEARCH_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+        pks = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        Product.objects.filter(pk__in=pks).reindex_search()
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.search_text = build_search_text(obj.name, obj.brand, obj.description)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        index_products([(obj.pk, obj.search_text) for obj in objs if obj.pk is not None])
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if not _SEARCH_FIELDS.isdisjoint(fields):
+            Product.objects.filter(pk__in=[obj.pk for obj in objs]).reindex_search()
+        return rows
+
+    def reindex_search(self):
+        """Recompute search_text (and the SQLite FTS rows) from the stored name/brand/description."""
+        products = [
+            Product(pk=pk, search_text=build_search_text(name, brand, description))
+            for pk, name, brand, description in self.values_list("pk", "name", "brand", "description")
+        ]
+        self.model.objects.bulk_update(products, ["search_text"], batch_size=500)
+        index_products([(p.pk, p.search_text) for p in products])
+        return len(products)
+
+    def catalog(self):
+        """Products ready for ProductSerializer: variants fetched in one extra query."""
+        return self.prefetch_related("variants")
+
+    def sync_promo_prices(self):
+        """
+        One UPDATE recomputing the variant-derived columns: promo_variant_new_price
+        from the biggest variant (largest size_ml, else highest price — same rule
+        as _biggest_variant) and the variant price range used by price filters.
+        """
+        variant_prices = ProductVariant.objects.filter(product=OuterRef("pk")).order_by().values("product")
+        return self.update(
+            updated_at=Now(),  # variant changes count as product changes for ETags
+            promo_variant_new_price=_promo_price(Q(has_discount=True), F("discount_percent")),
+            variant_min_price=Subquery(variant_prices.annotate(p=Min("price")).values("p")),
+            variant_max_price=Subquery(variant_prices.annotate(p=Max("price")).values("p")),
+        )
+
+    def price_between(self, low=None, high=None):
+        """
+        Products purchasable within [low, high]: the effective price (promo when
+        active), the promo variant price or the price of at least one variant
+        falls in the range. The stored variant min/max span only pre-filters;
+        the EXISTS checks an actual variant price.
+        """
+        def within(field):
+            q = Q(**{f"{field}__isnull": False})
+            if low is not None:
+                q &= Q(**{f"{field}__gte": low})
+            if high is not None:
+                q &= Q(**{f"{field}__lte": high})
+            return q
+
+        variants = Q(variant_min_price__isnull=False)
+        variant_in_range = Q()
+        if low is not None:
+            variants &= Q(variant_max_price__gte=low)
+            variant_in_range &= Q(price__gte=low)
+        if high is not None:
+            variants &= Q(variant_min_price__lte=high)
+            variant_in_range &= Q(price__lte=high)
+        variants &= Exists(ProductVariant.objects.filter(variant_in_range, product=OuterRef("pk")))
+        return self.filter(within("effective_price") | within("promo_variant_new_price") | variants)
+
+    def apply_discount(self, pct: int):
+        """
+        Sets new_price = price - pct% (rounded to cents in SQL) and the matching
+        promo variant price, in one UPDATE without loading the rows. The
+        generated discount columns still hold the old values during the
+        UPDATE, so their formulas are repeated on the new price here.
+        Returns the number of products updated.
+        """
+        new_price = Round(F("price") * Value(100 - int(pct)) / _HUNDRED, 2)
+        on_sale = GreaterThan(new_price, 0) & LessThan(new_price, F("price"))
+        percent = Round((F("price") - new_price) * _HUNDRED / F("price"))
+        return self.filter(price__gt=0).update(
+            new_price=new_price,
+            updated_at=Now(),
+            promo_variant_new_price=_promo_price(on_sale, percent),
+        )
+
+    def clear_discount(self):
+        return self.update(new_price=None, promo_variant_new_price=None, updated_at=Now())
+
+
+def _promo_price(on_sale, percent):
+    """Biggest variant's price minus `percent`, where `on_sale` holds (else NULL)."""
+    biggest = (
+        ProductVariant.objects.filter(product=OuterRef("pk"))
+        .annotate(
+            _sized=Case(When(size_ml__gt=0, then=Value(1)), default=Value(0)),
+            _tiebreak=Case(When(size_ml__gt=0, then=F("price")), default=-F("price")),
+        )
+        .order_by("-_sized", F("size_ml").desc(nulls_last=True), "_tiebreak", "label")
+        .values("price")[:1]
+    )
+    return Case(
+        When(on_sale, then=Round(Subquery(biggest) * (Value(100) - percent) / _HUNDRED, 2)),
+        default=None,
+        output_field=models.DecimalField(max_digits=8, decimal_places=2),
+    )
 
 
 class Product(models.Model):
@@ -34,6 +196,8 @@ class Product(models.Model):
 
     stock = models.BooleanField(default=False)
     image = models.ImageField(upload_to="products/", null=True, blank=True)
+    # resized WebP/JPEG copies of `image`: {"400": {"webp": name, "jpeg": name}, ...}
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     category = models.CharField(
         max_length=30,  # keep >= longest slug ("hyper_pigmentation" length 19; 30 is safe)
@@ -43,24 +207,106 @@ class Product(models.Model):
     )
     brand = models.CharField(max_length=120, blank=True, default="", db_index=True)
 
-    @property
-    def has_discount(self):
-        try:
-            return bool(self.new_price and self.new_price < self.price)
-        except (TypeError, InvalidOperation):
-            return False
+    # promo state, computed by the database so bulk UPDATEs can't leave it stale
+    has_discount = models.GeneratedField(
+        expression=Case(When(_ON_SALE, then=Value(True)), default=Value(False)),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+    discount_percent = models.GeneratedField(
+        expression=Case(
+            When(_ON_SALE, then=Cast(Round((F("price") - F("new_price")) * _HUNDRED / F("price")), models.IntegerField())),
+            default=Value(0),
+        ),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+    # what the shopper pays for the product itself: promo price when active
+    effective_price = models.GeneratedField(
+        expression=Case(When(_ON_SALE, then=F("new_price")), default=F("price")),
+        output_field=models.DecimalField(max_digits=8, decimal_places=2),
+        db_persist=True,
+    )
+    # depend on variants: refreshed by sync_promo() on every product/variant write
+    promo_variant_new_price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True, editable=False
+    )
+    variant_min_price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True, editable=False
+    )
+    variant_max_price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True, editable=False
+    )
 
-    @property
-    def discount_percent(self):
-        if self.has_discount:
-            try:
-                return int(round((self.price - self.new_price) / self.price * 100))
-            except (TypeError, InvalidOperation, ZeroDivisionError):
-                return 0
-        return 0
+    # folded + stemmed name/brand/description, indexed per DB (see product/search.py)
+    search_text = models.TextField(blank=True, default="", editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # brand filters compare Lower("brand") (see Brand.normalize); newest first within a brand
+            models.Index(Lower("brand"), F("id").desc(), name="product_brand_newest_idx"),
+            models.Index(fields=["-discount_percent", "-id"], name="product_discount_idx"),
+            models.Index(fields=["-id"], condition=Q(has_discount=True), name="product_on_sale_idx"),
+            # ProductsList filter + ?ordering= combinations (descending sorts scan backwards)
+            models.Index(fields=["category", "effective_price", "id"], name="product_cat_price_idx"),
+            models.Index(fields=["effective_price", "id"], name="product_price_idx"),
+            models.Index(fields=["category", "-id"], name="product_cat_newest_idx"),
+            models.Index(fields=["name", "id"], name="product_name_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored brand/image so save() can react to changes
+        instance._loaded_brand = instance.__dict__.get("brand")
+        instance._loaded_image = instance.__dict__.get("image", models.DEFERRED)
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.brand = (self.brand or "").strip()
+        self.search_text = build_search_text(self.name, self.brand, self.description)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "search_text", "updated_at"}
+        super().save(*args, **kwargs)
+        self.sync_promo()
+
+        previous = getattr(self, "_loaded_brand", None)
+        if previous != self.brand:
+            Brand.objects.sync(self.brand, previous)
+            self._loaded_brand = self.brand
+
+        loaded_image = getattr(self, "_loaded_image", None)
+        if loaded_image is not models.DEFERRED and (self.image.name or "") != (loaded_image or ""):
+            self.refresh_image_derivatives()
+            self._loaded_image = self.image.name
+
+    def refresh_image_derivatives(self):
+        """Rebuild the resized copies of `image` and delete the superseded ones."""
+        old = self.image_derivatives
+        new = build_derivatives(self.image) if self.image else {}
+        delete_derivatives(self.image.storage, old, keep=new)
+        self.image_derivatives = new
+        Product.objects.filter(pk=self.pk).update(image_derivatives=new)
+
+    def sync_promo(self):
+        """Recompute the stored promo price and reload the DB-computed promo fields."""
+        Product.objects.filter(pk=self.pk).sync_promo_prices()
+        self.refresh_from_db(
+            fields=[
+                "has_discount", "discount_percent", "effective_price", "promo_variant_new_price",
+                "variant_min_price", "variant_max_price", "updated_at",
+            ]
+        )
+        self.__dict__.pop("promo_variant", None)
 
     # ----- variant-promo helpers (promo applies ONLY to biggest variant) -----
     def _biggest_variant(self):
+        # uses the prefetch cache when loaded via Product.objects.catalog()
         vs = list(self.variants.all())
         if not vs:
             return None
@@ -69,8 +315,9 @@ class Product(models.Model):
             return max(with_size, key=lambda v: v.size_ml)
         return max(vs, key=lambda v: v.price)
 
-    @property
+    @cached_property
     def promo_variant(self):
+        # computed once per instance; the three promo_variant_* fields read it
         if not self.has_discount:
             return None
         return self._biggest_variant()
@@ -80,15 +327,6 @@ class Product(models.Model):
         v = self.promo_variant
         return v.id if v else None
 
-    @property
-    def promo_variant_new_price(self):
-        v = self.promo_variant
-        if not v:
-            return None
-        pct = Decimal(self.discount_percent) / Decimal(100)
-        newp = (Decimal(v.price) * (Decimal(1) - pct)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        return newp
-
     @property
     def promo_variant_old_price(self):
         v = self.promo_variant
@@ -105,6 +343,9 @@ class ProductVariant(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2)
     in_stock = models.BooleanField(default=True)
     sku = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatalogQuerySet.as_manager()
 
     class Meta:
         unique_together = ("product", "label")
@@ -114,6 +355,158 @@ class ProductVariant(models.Model):
         return f"{self.product.name} – {self.label}"
 
 
+class BrandQuerySet(CatalogQuerySet):
+    def sync(self, *names):
+        """Create/retire the Brand rows for these product brand values."""
+        for key in {Brand.normalize(n) for n in names if n and n.strip()}:
+            sample = (
+                Product.objects.alias(brand_key=Lower("brand"))
+                .filter(brand_key=key)
+                .values_list("brand", flat=True)
+                .first()
+            )
+            if sample is None:
+                self.filter(key=key).delete()
+            else:
+                self.get_or_create(key=key, defaults={"name": sample})
+
+    def rebuild(self):
+        """Full resync from Product.brand (migrations, bulk brand updates)."""
+        present = {}
+        for brand in Product.objects.exclude(brand="").order_by("id").values_list("brand", flat=True):
+            present.setdefault(Brand.normalize(brand), brand.strip())
+        self.exclude(key__in=present).delete()
+        existing = set(self.values_list("key", flat=True))
+        self.bulk_create(
+            [Brand(key=k, name=n) for k, n in present.items() if k not in existing],
+            ignore_conflicts=True,
+        )
+
+
+class Brand(models.Model):
+    """
+    Distinct product brands, one row per case-insensitive key, maintained from
+    Product writes. Product.brand stays the source of truth.
+    """
+    name = models.CharField(max_length=120)  # display form, first spelling seen
+    key = models.CharField(max_length=120, unique=True)  # LOWER(brand)
+
+    objects = BrandQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["key"]
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        # Python lower() to match SQL LOWER() used by the product brand index
+        return (name or "").strip().lower()
+
+    def __str__(self):
+        return self.name
+
+
+def sync_product_brand(sender, instance, **kwargs):
+    """post_delete on Product: drop the brand if it was its last product."""
+    Brand.objects.sync(instance.brand)
+
+
+def delete_product_images(sender, instance, **kwargs):
+    """post_delete on Product: remove the derivatives (the original upload is kept)."""
+    delete_derivatives(instance.image.storage, instance.image_derivatives)
+
+
+def sync_variant_product(sender, instance, **kwargs):
+    """post_save/post_delete on ProductVariant: keep the parent's promo price current."""
+    Product.objects.filter(pk=instance.product_id).sync_promo_prices()
+
+
+class SimilarProduct(models.Model):
+    """Precomputed "similar products" (product/similar.py), `rank` 0 = most similar."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="similar_entries")
+    similar = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    built_at = models.DateTimeField()
+
+    objects = CatalogQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["product", "rank"]
+        constraints = [
+            # also the index behind /api/product/<pk>/similar/
+            models.UniqueConstraint(fields=["product", "rank"], name="similar_product_rank_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} ~ {self.similar_id} ({self.score:.2f})"
+
+
+class WishlistItemQuerySet(models.QuerySet):
+    def add(self, user_id, product_id) -> bool:
+        """
+        INSERT ... SELECT from the product row, ignoring a duplicate (user, product):
+        True if a row was inserted, False if it already existed or the product
+        doesn't exist. Raw SQL sends no post_save, so WishlistCount is adjusted here.
+        """
+        table, products = self.model._meta.db_table, Product._meta.db_table
+        connection = connections[self.db]
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        with transaction.atomic(using=self.db), connection.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO {table} (user_id, product_id, created_at) "
+                f"SELECT %s, id, %s FROM {products} WHERE id = %s "
+                f"ON CONFLICT (user_id, product_id) DO NOTHING",
+                [user_id, now, product_id],
+            )
+            added = cur.rowcount == 1
+            if added:
+                WishlistCount.objects.adjust(user_id, 1)
+        return added
+
+    def remove(self, user_id, **lookup) -> int:
+        """
+        One conditional DELETE of the user's matching rows; WishlistCount moves
+        by the rows actually deleted. _raw_delete sends no post_delete: a
+        Collector would signal rows a concurrent remove already deleted, and
+        decrement twice.
+        """
+        with transaction.atomic(using=self.db):
+            removed = self.filter(user_id=user_id, **lookup)._raw_delete(self.db)
+            if removed:
+                WishlistCount.objects.adjust(user_id, -removed)
+        return removed
+
+    def merge(self, user_id, product_ids):
+        """
+        Adds every (user, product) pair not already there in one
+        bulk_create(ignore_conflicts=True); `product_ids` must exist. Resets
+        WishlistCount from the final row count.
+        """
+        with transaction.atomic(using=self.db):
+            self.bulk_create(
+                [self.model(user_id=user_id, product_id=pid) for pid in product_ids],
+                ignore_conflicts=True,
+            )
+            total = self.filter(user_id=user_id).count()
+            WishlistCount.objects.update_or_create(user_id=user_id, defaults={"count": total})
+        return total
+
+    def toggle(self, user_id, product_id):
+        """
+        Removes the (user, product) row if present, otherwise adds it: one
+        conditional DELETE or INSERT, race-free thanks to the unique pair.
+        Returns "added", "removed" or None (unknown product) and the new total.
+        """
+        with transaction.atomic(using=self.db):
+            if self.remove(user_id, product_id=product_id):
+                state = "removed"
+            elif self.add(user_id, product_id) or self.filter(user_id=user_id, product_id=product_id).exists():
+                state = "added"  # (a concurrent click may have inserted it first)
+            else:
+                return None, None
+            return state, WishlistCount.objects.total(user_id)
+
+
 class WishlistItem(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="wishlist_items"
@@ -123,6 +516,8 @@ class WishlistItem(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = WishlistItemQuerySet.as_manager()
+
     class Meta:
         unique_together = ("user", "product")
         ordering = ["-created_at"]
@@ -131,11 +526,70 @@ class WishlistItem(models.Model):
         return f"{self.user} → {self.product}"
 
 
+class WishlistCountQuerySet(models.QuerySet):
+    def adjust(self, user_id, delta):
+        """count += delta in one UPDATE; a user's first change seeds the row from COUNT(*)."""
+        if not self.filter(user_id=user_id).update(count=F("count") + delta):
+            actual = WishlistItem.objects.filter(user_id=user_id).count()
+            self.update_or_create(user_id=user_id, defaults={"count": actual})
+
+    def reconcile(self):
+        """Recount every existing counter from WishlistItem (one GROUP BY); returns how many were off."""
+        actual = dict(
+            WishlistItem.objects.order_by().values("user").annotate(n=Count("id")).values_list("user", "n")
+        )
+        wrong = [c for c in self.all() if c.count != actual.get(c.user_id, 0)]
+        for counter in wrong:
+            counter.count = actual.get(counter.user_id, 0)
+        self.bulk_update(wrong, ["count"])
+        return len(wrong)
+
+    def total(self, user_id) -> int:
+        count = self.filter(user_id=user_id).values_list("count", flat=True).first()
+        if count is None:
+            count = WishlistItem.objects.filter(user_id=user_id).count()
+            self.get_or_create(user_id=user_id, defaults={"count": count})
+        return count
+
+
+class WishlistCount(models.Model):
+    """
+    Per-user number of WishlistItem rows. Kept in step by the WishlistItem
+    post_save/post_delete receivers below (admin, cascades, create()/delete())
+    and by the bulk paths add/merge that send no signals; missing rows are
+    seeded from COUNT(*). `manage.py reconcile_wishlist_counts` repairs drift.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    objects = WishlistCountQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count}"
+
+
+def wishlist_item_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save on WishlistItem: count += 1 (an absent counter is seeded later from COUNT(*))."""
+    if created and not raw:
+        WishlistCount.objects.filter(user_id=instance.user_id).update(count=F("count") + 1)
+
+
+def wishlist_item_deleted(sender, instance, **kwargs):
+    """post_delete on WishlistItem (admin, Product/User cascades; remove() adjusts itself): count -= 1."""
+    WishlistCount.objects.filter(user_id=instance.user_id, count__gt=0).update(count=F("count") - 1)
+
+
 class ShippingRate(models.Model):
+    """The only shipping-rate table (payments re-exports it); read through product/shipping.py."""
     city = models.CharField(max_length=120, unique=True, db_index=True)
-    price = models.DecimalField(max_digits=6, decimal_places=2)  # DH
+    price = models.DecimalField(max_digits=8, decimal_places=2)  # DH
     active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatalogQuerySet.as_manager()
 
     class Meta:
         ordering = ["city"]
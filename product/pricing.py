@@ -0,0 +1,131 @@
+# product/pricing.py
+"""
+Server-side cart pricing. /api/checkout/quote/, COD orders and payments all
+price a cart with `quote()`; client-sent prices and totals are ignored.
+
+A line is {product_id (or legacy "id"), variant_id?, qty}. Its unit price is
+what the product page shows:
+
+    with a variant      the variant's price, or promo_variant_new_price when
+                        it is the promo (biggest) variant of a discounted product
+    without a variant   the product's effective_price (new_price while on sale)
+
+Every product of the cart comes from one query (plus the variants prefetch),
+whatever the number of lines; shipping comes from the cached rate table
+(product/shipping.py). Amounts are Decimal, rounded to the cent.
+"""
+from decimal import Decimal
+
+from .shipping import shipping_rates
+
+QUOTE_MAX_LINES = 100
+QUOTE_MAX_QTY = 99
+CENT = Decimal("0.01")
+
+
+def _int(value):
+    if isinstance(value, (bool, float)):
+        raise ValueError(value)
+    return int(value)
+
+
+def parse_lines(raw):
+    """[{product_id, variant_id, qty}, ...] → [(product_id, variant_id, qty)]; ValueError if malformed."""
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("items must be a non-empty list")
+    if len(raw) > QUOTE_MAX_LINES:
+        raise ValueError(f"At most {QUOTE_MAX_LINES} items per cart.")
+    lines = []
+    for item in raw:
+        if not isinstance(item, dict):
+            raise ValueError("each item must be an object")
+        try:
+            product_id = _int(item.get("product_id", item.get("id")))
+            variant_id = item.get("variant_id")
+            variant_id = None if variant_id in (None, "") else _int(variant_id)
+            qty = _int(item.get("qty", 1))
+        except (TypeError, ValueError):
+            raise ValueError("product_id, variant_id and qty must be integers")
+        if not 1 <= qty <= QUOTE_MAX_QTY:
+            raise ValueError(f"qty must be between 1 and {QUOTE_MAX_QTY}")
+        lines.append((product_id, variant_id, qty))
+    return lines
+
+
+def _unit_price(product, variant):
+    if variant is None:
+        return product.effective_price, product.has_discount
+    if variant == product.promo_variant and product.promo_variant_new_price is not None:
+        return product.promo_variant_new_price, True
+    return variant.price, False
+
+
+def quote(items, city=None, require_shipping=False):
+    """
+    Price `items` for delivery to `city`:
+    {"items": [...], "city", "subtotal", "shipping", "total"}.
+    shipping is None without a city (or, unless require_shipping, without an
+    active rate for it). Raises ValueError for malformed lines, unknown
+    products/variants or a missing shipping rate.
+    """
+    from .models import Product
+
+    lines = parse_lines(items)
+    products = Product.objects.catalog().only(
+        "id", "name", "price", "new_price", "stock",
+        "has_discount", "effective_price", "promo_variant_new_price",
+    ).in_bulk({product_id for product_id, _, _ in lines})
+
+    priced = []
+    subtotal = Decimal("0")
+    for product_id, variant_id, qty in lines:
+        product = products.get(product_id)
+        if product is None:
+            raise ValueError(f"Unknown product {product_id}.")
+        variant = None
+        if variant_id is not None:
+            variant = next((v for v in product.variants.all() if v.id == variant_id), None)
+            if variant is None:
+                raise ValueError(f"Unknown variant {variant_id} for product {product_id}.")
+        unit_price, promo = _unit_price(product, variant)
+        line_total = (unit_price * qty).quantize(CENT)
+        subtotal += line_total
+        priced.append({
+            "product_id": product.id,
+            "variant_id": variant.id if variant else None,
+            "name": product.name,
+            "label": variant.label if variant else None,
+            "qty": qty,
+            "unit_price": unit_price.quantize(CENT),
+            "line_total": line_total,
+            "promo": promo,
+            "in_stock": variant.in_stock if variant else product.stock,
+        })
+
+    city = (city or "").strip()
+    shipping = shipping_rates().price(city) if city else None
+    if shipping is None and require_shipping:
+        raise ValueError(f"No shipping rate for {city!r}." if city else "city required")
+    shipping = shipping.quantize(CENT) if shipping is not None else None
+    return {
+        "items": priced,
+        "city": city,
+        "subtotal": subtotal,
+        "shipping": shipping,
+        "total": subtotal + (shipping or 0),
+    }
+
+
+def order_items(q):
+    """Quote lines in the stored order shape ({id, name, qty, price, ...}; JSON-safe strings)."""
+    return [
+        {
+            "id": line["product_id"],
+            "variant_id": line["variant_id"],
+            "name": line["name"] if not line["label"] else f"{line['name']} – {line['label']}",
+            "qty": line["qty"],
+            "price": str(line["unit_price"]),
+            "line_total": str(line["line_total"]),
+        }
+        for line in q["items"]
+    ]
@@ -0,0 +1,176 @@
+# product/search.py
+"""
+Product search backend.
+
+Every product keeps a normalized `search_text` (accent-folded, lowercased,
+light FR/EN stemming) computed in Python, so both databases index the exact
+same tokens:
+
+- PostgreSQL: GIN index on to_tsvector('simple', search_text) for prefix
+  matching + GIN trigram index for typo tolerance (pg_trgm word similarity).
+- SQLite: FTS5 table `product_search` (rowid = product id), kept in sync by
+  the post_save/post_delete receivers below and by ProductQuerySet's bulk
+  writes; typos are corrected against the FTS5 vocabulary.
+"""
+import difflib
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+FUZZY_CUTOFF = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# longest first; applied once per token, symmetric for indexed text and queries
+_SUFFIXES = sorted(
+    {
+        # French
+        "ements", "ement", "ations", "ation", "atrices", "atrice", "ateurs", "ateur",
+        "euses", "euse", "eux", "ites", "ite", "iques", "ique", "ives", "ive", "ifs",
+        "ables", "able", "antes", "ante", "ants", "ant", "elles", "elle", "aux", "e",
+        # English
+        "ings", "ing", "ness", "ments", "ment", "ies", "ed", "ly", "es", "s", "x",
+    },
+    key=len,
+    reverse=True,
+)
+_MIN_STEM = 3
+
+
+def fold(text: str) -> str:
+    """'Éclaircissement' → 'eclaircissement'."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str):
+    return [stem(t) for t in _TOKEN_RE.findall(fold(text)) if len(t) > 1]
+
+
+def build_search_text(*parts) -> str:
+    return " ".join(t for part in parts for t in tokenize(part))
+
+
+# ----------------------------------------------------------------------------
+# index maintenance (SQLite only; Postgres indexes the column directly)
+# ----------------------------------------------------------------------------
+
+def index_product(sender, instance, **kwargs):
+    index_products([(instance.pk, instance.search_text)])
+
+
+def index_products(rows):
+    """(product id, search_text) pairs → FTS rows; used after bulk writes too."""
+    if connection.vendor != "sqlite" or not rows:
+        return
+    with connection.cursor() as cur:
+        cur.executemany("DELETE FROM product_search WHERE rowid = %s", [[pk] for pk, _ in rows])
+        cur.executemany("INSERT INTO product_search(rowid, search_text) VALUES (%s, %s)", rows)
+
+
+def unindex_product(sender, instance, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cur:
+        cur.execute("DELETE FROM product_search WHERE rowid = %s", [instance.pk])
+
+
+# ----------------------------------------------------------------------------
+# querying
+# ----------------------------------------------------------------------------
+
+def search_products(qs, term: str):
+    """
+    Filters `qs` to products matching `term` and annotates `search_rank`
+    (higher = more relevant). Callers order by ("-search_rank", "-id").
+    """
+    tokens = tokenize(term)
+    if not tokens:
+        return qs.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == "postgresql":
+        return _search_postgres(qs, tokens)
+    if connection.vendor == "sqlite":
+        return _search_sqlite(qs, tokens)
+
+    for t in tokens:
+        qs = qs.filter(search_text__contains=t)
+    return qs.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _search_postgres(qs, tokens):
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+    )
+    from django.db.models import Q
+
+    # must match the index expression created in migration 0018
+    vector = SearchVector("search_text", config="simple")
+    query = SearchQuery(" & ".join(f"{t}:*" for t in tokens), config="simple", search_type="raw")
+    phrase = " ".join(tokens)
+    # ts_rank + word_similarity is real (float4): cast to double precision so the
+    # value a cursor round-trips through Python compares equal to the row's rank
+    rank = Cast(SearchRank(vector, query) + TrigramWordSimilarity(phrase, "search_text"), FloatField())
+
+    return (
+        qs.annotate(search_vector=vector)
+        .filter(Q(search_vector=query) | Q(search_text__trigram_word_similar=phrase))
+        .annotate(search_rank=rank)
+    )
+
+
+def _fts_match(groups) -> str:
+    # each group: alternatives for one query token, all prefix-matched
+    return " AND ".join(
+        "(" + " OR ".join(f'"{t}"*' for t in alts) + ")" for alts in groups
+    )
+
+
+def _fts_any(match: str) -> bool:
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM product_search WHERE product_search MATCH %s LIMIT 1", [match])
+        return cur.fetchone() is not None
+
+
+def _close_terms(token: str):
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT term FROM product_search_vocab WHERE length(term) BETWEEN %s AND %s",
+            [len(token) - 2, len(token) + 2],
+        )
+        vocab = [row[0] for row in cur.fetchall()]
+    return difflib.get_close_matches(token, vocab, n=3, cutoff=FUZZY_CUTOFF)
+
+
+def _search_sqlite(qs, tokens):
+    match = _fts_match([[t] for t in tokens])
+    if not _fts_any(match):
+        # typo tolerance: swap each token for its nearest indexed terms
+        groups = [[t] + _close_terms(t) for t in tokens]
+        if not any(len(g) > 1 for g in groups):
+            return qs.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        match = _fts_match(groups)
+
+    # the FTS lookups run inside the product query, so category/brand/price/cursor
+    # filters apply to every match (no global top-N). bm25() is lower-is-better:
+    # flip it so both backends sort "-search_rank".
+    pk = f"{connection.ops.quote_name(qs.model._meta.db_table)}.{connection.ops.quote_name('id')}"
+    rank = RawSQL(
+        "SELECT -bm25(product_search) FROM product_search "
+        f"WHERE product_search MATCH %s AND rowid = {pk}",
+        [match],
+        output_field=FloatField(),
+    )
+    matches = RawSQL("SELECT rowid FROM product_search WHERE product_search MATCH %s", [match])
+    return qs.filter(id__in=matches).annotate(search_rank=rank)
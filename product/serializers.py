@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .images import derivative_urls
 from .models import Product, ProductVariant, WishlistItem, ShippingRate
 
 
@@ -10,10 +11,22 @@ class ProductVariantSerializer(serializers.ModelSerializer):
 
 class ProductSerializer(serializers.ModelSerializer):
     variants = ProductVariantSerializer(many=True, read_only=True)
+    has_discount = serializers.ReadOnlyField()
+    discount_percent = serializers.ReadOnlyField()
     # expose promo fields so the UI can show promo only on the biggest variant
     promo_variant_id = serializers.ReadOnlyField()
     promo_variant_old_price = serializers.ReadOnlyField()
     promo_variant_new_price = serializers.ReadOnlyField()
+    # resized copies of `image`: {"200": {"webp": url, "jpeg": url}, "400": {...}, ...}
+    images = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        # optional sparse fieldset: ProductSerializer(qs, many=True, fields={"id", "name"})
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     class Meta:
         model = Product
@@ -23,9 +36,13 @@ class ProductSerializer(serializers.ModelSerializer):
             "stock", "image", "category", "brand",
             "has_discount", "discount_percent",
             "promo_variant_id", "promo_variant_old_price", "promo_variant_new_price",
+            "images",
             "variants",
         ]
 
+    def get_images(self, obj):
+        return derivative_urls(obj.image.storage, obj.image_derivatives)
+
 
 class WishlistItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
@@ -44,3 +61,24 @@ class ShippingRateSerializer(serializers.ModelSerializer):
         fields = ["id", "city", "price", "active", "created_at"]
         read_only_fields = ["id", "created_at"]
 
+
+
+class QuoteLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    variant_id = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField()
+    label = serializers.CharField(allow_null=True)
+    qty = serializers.IntegerField()
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    promo = serializers.BooleanField()
+    in_stock = serializers.BooleanField()
+
+
+class QuoteSerializer(serializers.Serializer):
+    """Read-only view of product.pricing.quote(); amounts as strings like other prices."""
+    items = QuoteLineSerializer(many=True)
+    city = serializers.CharField(allow_blank=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    shipping = serializers.DecimalField(max_digits=8, decimal_places=2, allow_null=True)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -0,0 +1,69 @@
+# product/shipping.py
+"""
+The one shipping-rate service: every endpoint (product and payments apps,
+checkout) reads active rates from here instead of querying ShippingRate.
+
+The active rates are loaded once per process into an immutable snapshot:
+a city → price map keyed on the accent/case/whitespace-normalized city
+name ("  FÈS " → "fes"), so a lookup is one dict hit. ShippingRate writes
+bump the catalog version (product/cache.py); the next read sees the new
+version and reloads the snapshot with one query. Other workers on a
+per-process cache don't see that bump, so a snapshot is also reloaded once
+it is CATALOG_CACHE_TIMEOUT old.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from .cache import catalog_version, snapshot_is_current
+from .search import fold
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def normalize_city(city) -> str:
+    return " ".join(fold(city or "").split())
+
+
+class RateTable:
+    def __init__(self, version, rates):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rates = tuple(rates)  # active ShippingRate rows, by city
+        self._keys = tuple(normalize_city(r.city) for r in self.rates)
+        self.by_city = MappingProxyType(dict(zip(self._keys, self.rates)))
+        self.prices = MappingProxyType({key: r.price for key, r in self.by_city.items()})
+
+    def get(self, city):
+        """The active ShippingRate for `city` (any accents/case), or None."""
+        return self.by_city.get(normalize_city(city))
+
+    def price(self, city):
+        """Price for `city` (any accents/case), or None if there is no active rate."""
+        return self.prices.get(normalize_city(city))
+
+    def search(self, q=None):
+        """Active rates whose normalized city contains `q` (all of them without q)."""
+        needle = normalize_city(q)
+        if not needle:
+            return self.rates
+        return tuple(r for r, key in zip(self.rates, self._keys) if needle in key)
+
+
+def shipping_rates() -> RateTable:
+    global _snapshot
+    version = catalog_version()
+    snapshot = _snapshot
+    if snapshot_is_current(snapshot, version):
+        return snapshot
+    with _lock:
+        if not snapshot_is_current(_snapshot, version):
+            from .models import ShippingRate
+
+            _snapshot = RateTable(version, ShippingRate.objects.filter(active=True).order_by("city"))
+        return _snapshot
+
+
+def shipping_price(city):
+    return shipping_rates().price(city)
@@ -0,0 +1,151 @@
+# product/similar.py
+"""
+"Similar products", precomputed into SimilarProduct by
+`manage.py build_similar_products` so the detail page reads them with one
+indexed lookup.
+
+Score of candidate q for product p (candidates share p's category or brand,
+or were bought / wishlisted together with it):
+
+    3   same category
+    2   same brand (case-insensitive)
+    0-2 price proximity: 2 * (1 - |Δ effective price| / larger price)
+    2 * ln(1 + orders containing both)
+    1 * ln(1 + customers who wishlisted both)
+"""
+import math
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+SIMILAR_PER_PRODUCT = 12
+
+W_CATEGORY = 3.0
+W_BRAND = 2.0
+W_PRICE = 2.0
+W_ORDERS = 2.0
+W_WISHLIST = 1.0
+
+
+def _order_product_ids(items):
+    ids = set()
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            ids.add(int(item.get("id") or item.get("product_id") or item.get("product")))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def _pair_counts(baskets, targets):
+    """{(a, b): n} for pairs co-occurring in baskets where a is a target."""
+    counts = Counter()
+    for basket in baskets:
+        for a, b in combinations(sorted(basket), 2):
+            if a in targets:
+                counts[a, b] += 1
+            if b in targets:
+                counts[b, a] += 1
+    return counts
+
+
+def _co_occurrence(targets):
+    from account.models import OrderModel
+    from .models import WishlistItem
+
+    orders = (
+        _order_product_ids(items)
+        for items in OrderModel.objects.exclude(status="CANCELLED").values_list("items", flat=True).iterator()
+    )
+    wishlists = defaultdict(set)
+    for user_id, product_id in WishlistItem.objects.values_list("user_id", "product_id").iterator():
+        wishlists[user_id].add(product_id)
+    return _pair_counts(orders, targets), _pair_counts(wishlists.values(), targets)
+
+
+def score(p, q, bought_together=0, wishlisted_together=0):
+    """p, q: (id, category, brand key, effective price) rows."""
+    s = 0.0
+    if p[1] == q[1]:
+        s += W_CATEGORY
+    if p[2] and p[2] == q[2]:
+        s += W_BRAND
+    high = max(p[3], q[3])
+    if high > 0:
+        s += W_PRICE * max(0.0, 1 - abs(float(p[3] - q[3])) / float(high))
+    s += W_ORDERS * math.log1p(bought_together)
+    s += W_WISHLIST * math.log1p(wishlisted_together)
+    return s
+
+
+def stale_product_ids():
+    """
+    Products to recompute: never built, changed since their last build, or
+    part of an order / wishlist entry newer than the last build.
+    """
+    from account.models import OrderModel
+    from .models import Product, SimilarProduct, WishlistItem
+
+    built = dict(
+        SimilarProduct.objects.order_by().values("product").annotate(at=Max("built_at"))
+        .values_list("product", "at")
+    )
+    stale = set()
+    for pk, updated_at in Product.objects.values_list("id", "updated_at"):
+        if pk not in built or (updated_at and updated_at > built[pk]):
+            stale.add(pk)
+
+    last = max(built.values(), default=None)
+    if last is not None:
+        for items in OrderModel.objects.filter(created_at__gt=last).values_list("items", flat=True):
+            stale |= _order_product_ids(items)
+        stale |= set(WishlistItem.objects.filter(created_at__gt=last).values_list("product_id", flat=True))
+    return stale
+
+
+def rebuild_similar(product_ids=None):
+    """Recompute the similar list of `product_ids` (every product if None). Returns how many."""
+    from .models import Product, SimilarProduct
+
+    rows = {
+        pk: (pk, category, (brand or "").strip().lower(), price)
+        for pk, category, brand, price in Product.objects.values_list("id", "category", "brand", "effective_price")
+    }
+    targets = set(rows) if product_ids is None else set(product_ids) & set(rows)
+    if not targets:
+        return 0
+
+    by_category, by_brand = defaultdict(set), defaultdict(set)
+    for row in rows.values():
+        by_category[row[1]].add(row[0])
+        if row[2]:
+            by_brand[row[2]].add(row[0])
+    orders, wishlists = _co_occurrence(targets)
+    related = defaultdict(set)
+    for a, b in (*orders, *wishlists):
+        related[a].add(b)
+
+    now = timezone.now()
+    entries = []
+    for pk in targets:
+        p = rows[pk]
+        candidates = (by_category[p[1]] | by_brand.get(p[2], set()) | related[pk]) & rows.keys()
+        candidates.discard(pk)
+        scored = sorted(
+            ((score(p, rows[q], orders[pk, q], wishlists[pk, q]), q) for q in candidates),
+            key=lambda sq: (-sq[0], -sq[1]),
+        )[:SIMILAR_PER_PRODUCT]
+        entries += [
+            SimilarProduct(product_id=pk, similar_id=q, score=s, rank=rank, built_at=now)
+            for rank, (s, q) in enumerate(scored)
+        ]
+
+    with transaction.atomic():
+        SimilarProduct.objects.filter(product_id__in=targets).delete()
+        SimilarProduct.objects.bulk_create(entries, batch_size=1000)
+    return len(targets)
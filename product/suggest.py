@@ -0,0 +1,105 @@
+# product/suggest.py
+"""
+In-process prefix index behind /api/products/suggest/.
+
+Every word of a product's name and brand (accent-folded, lowercased, not
+stemmed) goes into one sorted list; a prefix lookup is two bisects. The index
+is tagged with the catalog version (product/cache.py) and rebuilt from a
+single query the first time a lookup sees a newer version, so any product
+write — including bulk updates — is picked up and the warm path never
+touches the database. On a per-worker cache other workers miss that bump,
+so the index is also rebuilt once it is CATALOG_CACHE_TIMEOUT old.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+
+from .cache import catalog_version, snapshot_is_current
+from .search import fold
+
+SUGGEST_LIMIT = 10
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_lock = threading.Lock()
+_index = None
+
+
+def _words(text):
+    return _WORD_RE.findall(fold(text))
+
+
+def _thumb(storage, image, derivatives):
+    if derivatives:
+        smallest = derivatives[min(derivatives, key=int)]
+        name = smallest.get("webp") or next(iter(smallest.values()))
+        return storage.url(name)
+    return storage.url(image) if image else None
+
+
+class PrefixIndex:
+    def __init__(self, version, rows, storage):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.hits = {}    # id → response dict
+        self.rank = {}    # id → (folded name, words)
+        pairs = set()
+        for pk, name, brand, image, derivatives in rows:
+            self.hits[pk] = {
+                "id": pk, "name": name, "brand": brand,
+                "image_thumb": _thumb(storage, image, derivatives),
+            }
+            words = frozenset(_words(name) + _words(brand))
+            self.rank[pk] = (" ".join(_words(name)), words)
+            pairs.update((w, pk) for w in words)
+        pairs = sorted(pairs)
+        self.keys = [w for w, _ in pairs]
+        self.ids = [pk for _, pk in pairs]
+
+    def _prefixed(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        return set(self.ids[lo:hi])
+
+    def lookup(self, q, limit=SUGGEST_LIMIT):
+        tokens = _words(q)
+        if not tokens:
+            return []
+        # narrow on the longest token, then every token must start some word
+        longest = max(tokens, key=len)
+        ids = self._prefixed(longest)
+        others = [t for t in tokens if t != longest]
+        if others:
+            ids = [
+                pk for pk in ids
+                if all(any(w.startswith(t) for w in self.rank[pk][1]) for t in others)
+            ]
+
+        # names starting with the query first, then shortest names
+        phrase = " ".join(tokens)
+
+        def order(pk):
+            name = self.rank[pk][0]
+            return (not name.startswith(phrase), len(name), name, pk)
+
+        return [self.hits[pk] for pk in heapq.nsmallest(limit, ids, key=order)]
+
+
+def get_index():
+    global _index
+    version = catalog_version()
+    index = _index
+    if snapshot_is_current(index, version):
+        return index
+    with _lock:
+        if not snapshot_is_current(_index, version):
+            from .models import Product
+
+            rows = Product.objects.values_list("id", "name", "brand", "image", "image_derivatives")
+            _index = PrefixIndex(version, list(rows), Product._meta.get_field("image").storage)
+        return _index
+
+
+def suggest(q, limit=SUGGEST_LIMIT):
+    return get_index().lookup(q, limit)
@@ -1,14 +1,36 @@
+import io
+import tempfile
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from uuid import UUID
 from account import views
 from django.http import response
-from .models import Product
+from .models import Product, ProductVariant, ShippingRate, SimilarProduct, WishlistCount, WishlistItem
+from account.models import OrderModel
 from django.test import TestCase, Client
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework.test import force_authenticate
 from rest_framework.test import APIRequestFactory
-from .views import ProductCreateView, ProductDeleteView, ProductEditView
+from .pricing import quote
+from .shipping import shipping_price, shipping_rates
+from .suggest import suggest
+from .views import ProductCreateView, ProductDeleteView, ProductEditView, ProductsList
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from my_project import renderers
+from my_project.pagination import encode_cursor
+from PIL import Image
 
 
 class ProductApiTest(TestCase):
@@ -202,3 +224,999 @@ class ProductApisAuthTest(ProductApisSetUp):
         response = view(request, 1)
         self.assertEqual(response.status_code, 403) # Forbidden
 
+
+class ProductQueryCountTest(TestCase):
+
+    def setUp(self):
+        # a few discounted products, each with several variants
+        for i in range(5):
+            product = Product.objects.create(
+                name=f"Serum {i}",
+                price=200,
+                new_price=150,
+                stock=True,
+            )
+            for size in (30, 50, 100):
+                ProductVariant.objects.create(
+                    product=product, label=f"{size} ml", size_ml=size, price=size * 2
+                )
+
+    def test_products_list_query_count_is_constant(self):
+        # ETag aggregate + products + prefetched variants
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("products-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_product_details_query_count_is_constant(self):
+        product = Product.objects.first()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("product-details", args=[product.id]))
+        data = response.json()
+        biggest = product.variants.get(size_ml=100)
+        self.assertEqual(data["promo_variant_id"], biggest.id)
+        self.assertEqual(Decimal(str(data["promo_variant_old_price"])), Decimal("200"))
+        self.assertEqual(Decimal(str(data["promo_variant_new_price"])), Decimal("150"))
+
+
+class ProductCursorPaginationTest(TestCase):
+
+    def setUp(self):
+        for i in range(7):
+            Product.objects.create(
+                name=f"Cream {i}",
+                price=100 + i,
+                stock=True,
+                brand="Nuxe" if i % 2 else "CeraVe",
+            )
+
+    def test_without_limit_returns_plain_list(self):
+        response = self.client.get(reverse("products-list"))
+        self.assertIsInstance(response.json(), list)
+
+    def test_pages_follow_next_cursor_until_exhausted(self):
+        seen = []
+        url = reverse("products-list") + "?limit=3"
+        while True:
+            data = self.client.get(url).json()
+            seen += [p["id"] for p in data["results"]]
+            if not data["next"]:
+                break
+            url = reverse("products-list") + f"?limit=3&after={data['next']}"
+
+        expected = list(Product.objects.order_by("-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_respects_filters(self):
+        first = self.client.get(reverse("products-list") + "?brand=nuxe&limit=2").json()
+        self.assertEqual(len(first["results"]), 2)
+        rest = self.client.get(
+            reverse("products-list") + f"?brand=nuxe&limit=2&after={first['next']}"
+        ).json()
+        self.assertEqual(len(rest["results"]), 1)
+        self.assertIsNone(rest["next"])
+        self.assertTrue(all(p["brand"] == "Nuxe" for p in first["results"] + rest["results"]))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("products-list") + "?limit=2&after=garbage")
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages_validate_their_own_rows(self):
+        url = reverse("products-list")
+        with CaptureQueriesContext(connection) as ctx:
+            first = self.client.get(url, {"limit": 2, "search": "cream", "fields": "id,name"})
+        self.assertEqual(len(first.json()["results"]), 2)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
+        # one FTS probe + the page query; no second search for a validator
+        self.assertEqual(sum("product_search" in q["sql"] for q in ctx.captured_queries), 2)
+        params = {"limit": 2, "fields": "id,name"}
+        etag = self.client.get(url, params, HTTP_AUTHORIZATION="x")["ETag"]
+        self.assertEqual(self.client.get(url, params, HTTP_AUTHORIZATION="x", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        changed = Product.objects.get(pk=self.client.get(url, params).json()["results"][0]["id"])
+        changed.price = 1
+        changed.save()
+        self.assertEqual(self.client.get(url, params, HTTP_AUTHORIZATION="x", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_tampered_cursor_values_are_rejected(self):
+        url = reverse("products-list")
+        for ordering, values in (
+            ("newest", ["abc"]),
+            ("price", ["x", 1]),
+            ("price", [None, 1]),
+            ("price", [[1], 1]),
+        ):
+            keys = ProductsList.orderings[ordering]
+            response = self.client.get(url, {"ordering": ordering, "limit": 2, "after": encode_cursor(keys, values)})
+            self.assertEqual(response.status_code, 400, values)
+        # a valid cursor still decodes
+        ok = self.client.get(url, {"ordering": "price", "limit": 2, "after": encode_cursor(("effective_price", "id"), ["1.5", 1])})
+        self.assertEqual(ok.status_code, 200)
+
+
+class ProductSearchTest(TestCase):
+
+    def setUp(self):
+        self.serum = Product.objects.create(
+            name="Sérum Éclaircissement", brand="The Ordinary",
+            description="Unifie le teint", price=150, stock=True,
+        )
+        self.cream = Product.objects.create(
+            name="Crème hydratante", brand="Nuxe",
+            description="Pour peau sèche, léger sérum intégré", price=90, stock=True,
+        )
+        Product.objects.create(name="Mascara", brand="Maybelline", price=60, stock=True)
+
+    def _search(self, term):
+        response = self.client.get(reverse("products-list"), {"search": term})
+        return [p["id"] for p in response.json()]
+
+    def test_accent_folding(self):
+        self.assertEqual(self._search("eclaircissement"), [self.serum.id])
+
+    def test_stemming_and_prefix(self):
+        self.assertEqual(self._search("cremes"), [self.cream.id])
+        self.assertEqual(self._search("hydrat"), [self.cream.id])
+
+    def test_typo_tolerance(self):
+        self.assertEqual(self._search("mascarra"), [Product.objects.get(name="Mascara").id])
+
+    def test_results_ranked_by_relevance(self):
+        # name + description match beats description-only match
+        self.assertEqual(self._search("serum"), [self.serum.id, self.cream.id])
+
+    def test_bulk_writes_reindex(self):
+        Product.objects.filter(pk=self.cream.pk).update(name="Zanzibar balm")
+        self.assertEqual(self._search("zanzibar"), [self.cream.id])
+
+        self.serum.description = "Vitamine C"
+        Product.objects.bulk_update([self.serum], ["description"])
+        self.assertEqual(self._search("vitamine"), [self.serum.id])
+
+        created = Product.objects.bulk_create([Product(name="Gommage doux", price=40, stock=True)])
+        self.assertEqual(self._search("gommage"), [created[0].id])
+
+        Product.objects.filter(pk=self.cream.pk).update(search_text="")
+        call_command("reindex_search", stdout=io.StringIO())
+        self.assertEqual(self._search("zanzibar"), [self.cream.id])
+
+    def test_filters_apply_to_every_match(self):
+        for i in range(205):
+            Product.objects.create(name=f"Serum {i}", category="face", price=10, stock=True)
+        lips = Product.objects.create(name="Serum lèvres", category="lips", price=10, stock=True)
+        url = reverse("products-list")
+        self.assertEqual([p["id"] for p in self.client.get(url, {"search": "serum", "category": "lips"}).json()], [lips.id])
+        self.assertEqual(len(self._search("serum")), 208)
+        self.assertEqual(self.client.get(reverse("products-facets"), {"search": "serum"}).json()["total"], 208)
+
+        seen, after = [], None
+        while True:
+            data = self.client.get(url, {"search": "serum", "limit": 50, **({"after": after} if after else {})}).json()
+            seen += [p["id"] for p in data["results"]]
+            after = data["next"]
+            if not after:
+                break
+        self.assertEqual(seen, self._search("serum"))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.cream.name = "Baume lèvres"
+        self.cream.save()
+        self.assertEqual(self._search("baume"), [self.cream.id])
+        self.cream.delete()
+        self.assertEqual(self._search("baume"), [])
+
+
+class ProductPromoColumnsTest(TestCase):
+
+    def setUp(self):
+        self.small = Product.objects.create(name="Toner", price=100, new_price=90, stock=True)
+        self.big = Product.objects.create(name="Oil", price=199, new_price=150, stock=True)
+        self.full = Product.objects.create(name="Balm", price=80, stock=True)
+
+    def test_promo_values_are_stored(self):
+        self.assertTrue(self.big.has_discount)
+        self.assertEqual(self.big.discount_percent, 25)
+        self.assertFalse(self.full.has_discount)
+        self.assertEqual(self.full.discount_percent, 0)
+
+    def test_variant_writes_refresh_promo_price(self):
+        ProductVariant.objects.create(product=self.big, label="50 ml", size_ml=50, price=Decimal("99.99"))
+        self.big.refresh_from_db()
+        self.assertEqual(self.big.promo_variant_new_price, Decimal("74.99"))
+
+        ProductVariant.objects.filter(product=self.big).get().delete()
+        self.big.refresh_from_db()
+        self.assertIsNone(self.big.promo_variant_new_price)
+
+    def test_bulk_update_keeps_promo_in_sync(self):
+        Product.objects.filter(pk=self.full.pk).update(new_price=40)
+        self.full.refresh_from_db()
+        self.assertEqual(self.full.discount_percent, 50)
+
+    def test_on_sale_filter_and_discount_ordering(self):
+        response = self.client.get(reverse("products-list"), {"on_sale": "1", "ordering": "-discount_percent"})
+        self.assertEqual([p["id"] for p in response.json()], [self.big.id, self.small.id])
+
+
+class CatalogCacheTest(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(name="Lip Oil", price=70, stock=True, brand="Clarins")
+
+    def test_second_anonymous_request_is_served_from_cache(self):
+        first = self.client.get(reverse("products-list"), {"brand": "clarins"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("products-list"), {"brand": "clarins"})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+
+    def test_bulk_update_invalidates(self):
+        self.client.get(reverse("product-details", args=[self.product.id]))
+        Product.objects.filter(pk=self.product.pk).update(name="Lip Gloss")
+        response = self.client.get(reverse("product-details", args=[self.product.id]))
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertContains(response, "Lip Gloss")
+
+    def test_shipping_rate_write_invalidates(self):
+        ShippingRate.objects.create(city="Rabat", price=30)
+        self.client.get(reverse("shipping-rates-public"))
+        ShippingRate.objects.filter(city="Rabat").delete()
+        self.assertEqual(self.client.get(reverse("shipping-rates-public")).json(), [])
+
+
+class ConditionalGetTest(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(name="Face Mist", price=55, stock=True)
+
+    def test_unchanged_list_answers_304(self):
+        first = self.client.get(reverse("products-list"))
+        etag = first["ETag"]
+        with self.assertNumQueries(1):  # just the validator aggregate
+            response = self.client.get(
+                reverse("products-list"), {"page": "x"}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_response_also_answers_304(self):
+        etag = self.client.get(reverse("product-details", args=[self.product.id]))["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("product-details", args=[self.product.id]), HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_variant_change_or_delete_changes_etag(self):
+        etag = self.client.get(reverse("products-list"))["ETag"]
+        ProductVariant.objects.create(product=self.product, label="100 ml", price=55)
+        response = self.client.get(reverse("products-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        self.product.delete()
+        response = self.client.get(reverse("products-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+
+class SparseFieldsetTest(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Night Cream", description="long text " * 50, price=120, stock=True
+        )
+        ProductVariant.objects.create(product=self.product, label="50 ml", size_ml=50, price=120)
+
+    def test_fields_limit_columns_and_skip_variants(self):
+        with self.assertNumQueries(2):  # ETag aggregate + products, no variant prefetch
+            response = self.client.get(reverse("products-list"), {"fields": "id,name,price,image"})
+        row = response.json()[0]
+        self.assertEqual(set(row), {"id", "name", "price", "image"})
+
+    def test_include_variants(self):
+        response = self.client.get(
+            reverse("product-details", args=[self.product.id]),
+            {"fields": "name", "include": "variants"},
+        )
+        data = response.json()
+        self.assertEqual(set(data), {"id", "name", "variants"})
+        self.assertEqual(data["variants"][0]["label"], "50 ml")
+
+    def test_default_representation_unchanged(self):
+        row = self.client.get(reverse("products-list")).json()[0]
+        self.assertIn("description", row)
+        self.assertIn("variants", row)
+
+
+class ProductFacetsTest(TestCase):
+
+    def setUp(self):
+        Product.objects.create(name="A", price=10, stock=True, category="face", brand="Nuxe")
+        Product.objects.create(name="B", price=10, new_price=8, stock=False, category="face", brand="nuxe")
+        Product.objects.create(name="C", price=10, stock=True, category="lips", brand="Mac")
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(2):  # ETag aggregate + grouped counts
+            data = self.client.get(reverse("products-facets")).json()
+        self.assertEqual(data["total"], 3)
+        self.assertEqual(data["category"][0], {"value": "face", "label": "Visage", "count": 2})
+        self.assertEqual(data["brand"], [{"value": "Mac", "count": 1}, {"value": "Nuxe", "count": 2}])
+        self.assertEqual(data["in_stock"], {"true": 2, "false": 1})
+        self.assertEqual(data["on_sale"], {"true": 1, "false": 2})
+
+    def test_counts_follow_filters(self):
+        data = self.client.get(reverse("products-facets"), {"category": "lips"}).json()
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["brand"], [{"value": "Mac", "count": 1}])
+
+
+class BrandTableTest(TestCase):
+
+    def setUp(self):
+        self.a = Product.objects.create(name="A", price=10, stock=True, brand="La Roche-Posay")
+        self.b = Product.objects.create(name="B", price=10, stock=True, brand="la roche-posay ")
+        self.c = Product.objects.create(name="C", price=10, stock=True, brand="Avène")
+
+    def test_brands_endpoint_reads_sorted_brand_table(self):
+        with self.assertNumQueries(2):  # ETag aggregate + brand rows
+            response = self.client.get(reverse("brands-list"))
+        self.assertEqual(response.json(), ["Avène", "La Roche-Posay"])
+
+    def test_brand_retired_with_its_last_product(self):
+        self.c.brand = "Bioderma"
+        self.c.save()
+        self.a.delete()
+        self.assertEqual(
+            self.client.get(reverse("brands-list")).json(), ["Bioderma", "La Roche-Posay"]
+        )
+        self.b.delete()
+        self.assertEqual(self.client.get(reverse("brands-list")).json(), ["Bioderma"])
+
+    def test_brand_filter_is_case_insensitive(self):
+        response = self.client.get(reverse("products-list"), {"brand": "LA ROCHE-POSAY"})
+        self.assertEqual({p["id"] for p in response.json()}, {self.a.id, self.b.id})
+
+
+class ImageDerivativesTest(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.override = override_settings(MEDIA_ROOT=self.media.name)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        self.media.cleanup()
+
+    def _upload(self, name="photo.jpg", size=(1000, 600)):
+        buf = io.BytesIO()
+        Image.new("RGB", size, "pink").save(buf, "JPEG")
+        return SimpleUploadedFile(name, buf.getvalue(), content_type="image/jpeg")
+
+    def test_derivatives_built_exposed_and_cleaned_up(self):
+        product = Product.objects.create(name="Blush", price=45, stock=True, image=self._upload())
+        self.assertEqual(set(product.image_derivatives), {"200", "400", "800"})
+        storage = product.image.storage
+        old_names = [n for e in product.image_derivatives.values() for n in e.values()]
+        self.assertTrue(all(storage.exists(n) for n in old_names))
+
+        data = self.client.get(reverse("product-details", args=[product.id])).json()
+        self.assertTrue(data["images"]["400"]["webp"].endswith(".400.webp"))
+
+        product.image = self._upload("other.jpg", size=(300, 300))
+        product.save()
+        self.assertEqual(set(product.image_derivatives), {"200"})
+        self.assertFalse(any(storage.exists(n) for n in old_names))
+
+        new_names = [n for e in product.image_derivatives.values() for n in e.values()]
+        product.delete()
+        self.assertFalse(any(storage.exists(n) for n in new_names))
+
+    def test_backfill_command(self):
+        product = Product.objects.create(name="Kohl", price=20, stock=True, image=self._upload())
+        Product.objects.filter(pk=product.pk).update(image_derivatives={})
+        call_command("build_image_derivatives", stdout=io.StringIO())
+        product.refresh_from_db()
+        self.assertEqual(set(product.image_derivatives), {"200", "400", "800"})
+
+
+class MediaServingTest(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.override = override_settings(MEDIA_ROOT=self.media.name)
+        self.override.enable()
+        with open(f"{self.media.name}/logo.png", "wb") as fh:
+            fh.write(b"0123456789")
+        with open(f"{self.media.name}/serum.3f2a9c01de.400.webp", "wb") as fh:
+            fh.write(b"webp")
+
+    def tearDown(self):
+        self.override.disable()
+        self.media.cleanup()
+
+    def test_etag_not_modified_and_ranges(self):
+        url = reverse("media", args=["logo.png"])
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), b"0123456789")
+        self.assertEqual(res["Cache-Control"], "public, max-age=3600")
+        etag = res["ETag"]
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        res = self.client.get(url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(b"".join(res.streaming_content), b"2345")
+
+        res = self.client.get(url, HTTP_RANGE="bytes=-3", HTTP_IF_RANGE=etag)
+        self.assertEqual(b"".join(res.streaming_content), b"789")
+        # stale If-Range → full body
+        res = self.client.get(url, HTTP_RANGE="bytes=-3", HTTP_IF_RANGE='"old"')
+        self.assertEqual(res.status_code, 200)
+
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=50-").status_code, 416)
+
+    def test_hashed_names_are_immutable(self):
+        res = self.client.get(reverse("media", args=["serum.3f2a9c01de.400.webp"]))
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_accel_mode_and_traversal(self):
+        with override_settings(MEDIA_SERVE_MODE="accel", MEDIA_ACCEL_PREFIX="/_protected_media/"):
+            res = self.client.get(reverse("media", args=["logo.png"]))
+        self.assertEqual(res["X-Accel-Redirect"], "/_protected_media/logo.png")
+        self.assertEqual(res.content, b"")
+        self.assertEqual(self.client.get("/images/../settings.py").status_code, 404)
+        self.assertEqual(self.client.get("/images/missing.png").status_code, 404)
+
+
+class VariantDiffTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@gmail.com", password="admin1234"
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.product = Product.objects.create(name="Toner", price=100, stock=True)
+        self.small = ProductVariant.objects.create(product=self.product, label="50 ml", size_ml=50, price=60)
+        self.big = ProductVariant.objects.create(
+            product=self.product, label="100 ml", size_ml=100, price=100, sku="TON-100"
+        )
+        self.gone = ProductVariant.objects.create(product=self.product, label="Mini", size_ml=10, price=20)
+
+    def _put(self, variants):
+        return self.client.put(
+            reverse("product-update", args=[self.product.id]),
+            {"new_price": "80", "variants": variants}, format="json",
+        )
+
+    def test_matches_by_id_sku_and_label(self):
+        res = self._put([
+            {"id": self.small.id, "label": "50 ml", "size_ml": 50, "price": "60.00"},  # unchanged
+            {"label": "Grand format", "size_ml": 100, "price": "95", "sku": "TON-100"},  # renamed via SKU
+            {"label": "200 ml", "size_ml": 200, "price": "180"},                         # new
+        ])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["variant_changes"], {"inserted": 1, "updated": 1, "deleted": 1})
+
+        self.big.refresh_from_db()
+        self.assertEqual((self.big.label, self.big.price), ("Grand format", Decimal("95")))
+        self.assertTrue({self.small.id, self.big.id} <= {v["id"] for v in res.data["variants"]})
+        self.assertFalse(ProductVariant.objects.filter(id=self.gone.id).exists())
+        # the promo price follows the new biggest variant
+        self.assertEqual(res.data["promo_variant_id"], self.product.variants.get(size_ml=200).id)
+
+    def test_swapped_labels(self):
+        res = self._put([
+            {"id": self.small.id, "label": "100 ml", "size_ml": 100, "price": "100"},
+            {"id": self.big.id, "label": "50 ml", "size_ml": 50, "price": "60", "sku": "TON-100"},
+        ])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["variant_changes"], {"inserted": 0, "updated": 2, "deleted": 1})
+        self.assertEqual(
+            dict(self.product.variants.values_list("id", "label")),
+            {self.small.id: "100 ml", self.big.id: "50 ml"},
+        )
+
+    def test_malformed_variants_leave_rows_untouched(self):
+        res = self._put("not json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(self.product.variants.count(), 3)
+
+
+class BulkDiscountTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@gmail.com", password="admin1234"
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.serum = Product.objects.create(name="Serum", brand="Nuxe", category="face", price=Decimal("19.99"), stock=True)
+        ProductVariant.objects.create(product=self.serum, label="100 ml", size_ml=100, price=Decimal("33.33"))
+        self.cream = Product.objects.create(name="Cream", brand="nuxe ", category="body", price=80, stock=True)
+        self.other = Product.objects.create(name="Balm", brand="Avene", category="face", price=50, stock=True)
+
+    def test_one_update_rounded_in_sql(self):
+        with self.assertNumQueries(1):
+            n = Product.objects.filter(brand__iexact="nuxe").apply_discount(20)
+        self.assertEqual(n, 2)
+        self.serum.refresh_from_db()
+        self.assertEqual(self.serum.new_price, Decimal("15.99"))  # 15.992
+        self.assertEqual(self.serum.discount_percent, 20)
+        self.assertTrue(self.serum.has_discount)
+        # 33.33 * 0.80 = 26.664
+        self.assertEqual(self.serum.promo_variant_new_price, Decimal("26.66"))
+
+        self.assertEqual(Product.objects.filter(pk=self.serum.pk).clear_discount(), 1)
+        self.serum.refresh_from_db()
+        self.assertFalse(self.serum.has_discount)
+        self.assertIsNone(self.serum.promo_variant_new_price)
+
+    def test_endpoint_by_brand_and_category(self):
+        url = reverse("products-discount")
+        res = self.client.post(url, {"brand": "NUXE", "percent": 10}, format="json")
+        self.assertEqual(res.data, {"updated": 2, "percent": 10})
+        self.other.refresh_from_db()
+        self.assertIsNone(self.other.new_price)
+
+        res = self.client.post(url, {"category": "face", "percent": 0}, format="json")
+        self.assertEqual(res.data["updated"], 2)
+        self.assertEqual(Product.objects.filter(has_discount=True).count(), 1)
+
+        self.assertEqual(self.client.post(url, {"percent": 10}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(url, {"brand": "Nuxe", "percent": 150}, format="json").status_code, 400)
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin_user)
+        res = self.client.post(
+            reverse("admin:product_product_changelist") + "?category__exact=face",
+            {"action": "discount_custom", "percent": "25", "select_across": "1",
+             "index": "0", "_selected_action": [self.serum.pk]},
+        )
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(
+            set(Product.objects.filter(has_discount=True).values_list("name", flat=True)),
+            {"Serum", "Balm"},
+        )
+
+
+class ProductBatchTest(TestCase):
+
+    def setUp(self):
+        self.products = [
+            Product.objects.create(name=f"Mascara {i}", price=10 + i, stock=True) for i in range(3)
+        ]
+        for p in self.products:
+            ProductVariant.objects.create(product=p, label="10 ml", size_ml=10, price=p.price)
+
+    def test_requested_order_and_missing_ids(self):
+        a, b, c = (p.id for p in self.products)
+        url = reverse("products-batch")
+        # ETag aggregate + products + prefetched variants
+        with self.assertNumQueries(3):
+            res = self.client.get(url, {"ids": f"{c},999,{a},{c}"})
+        self.assertEqual([p["id"] for p in res.json()["results"]], [c, a])
+        self.assertEqual(res.json()["missing"], [999])
+
+        detail = self.client.get(reverse("product-details", args=[a])).json()
+        self.assertEqual(res.json()["results"][1], detail)
+
+        res = self.client.post(url, {"ids": [b, a]}, content_type="application/json")
+        self.assertEqual([p["id"] for p in res.json()["results"]], [b, a])
+
+    def test_malformed_ids(self):
+        url = reverse("products-batch")
+        self.assertEqual(self.client.get(url, {"ids": "1,x"}).status_code, 400)
+        self.assertEqual(self.client.post(url, {"ids": list(range(500))},
+                                          content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.post(url, [1, 2], content_type="application/json").status_code, 400)
+
+
+class StreamingListTest(TestCase):
+
+    def setUp(self):
+        for i in range(5):
+            p = Product.objects.create(name=f"Rouge n°{i}", price=f"{20 + i}.50", stock=True)
+            ProductVariant.objects.create(product=p, label="5 ml", size_ml=5, price=p.price)
+
+    def test_streamed_products_match_buffered_and_are_cached(self):
+        buffered = self.client.get(reverse("products-list"), {"category": "other"})
+        self.assertFalse(buffered.streaming)
+        with override_settings(STREAMING_LIST_CHUNK_SIZE=2):
+            streamed = self.client.get(reverse("products-list"))
+            self.assertTrue(streamed.streaming)
+            self.assertEqual(streamed["X-Cache"], "MISS")
+            self.assertEqual(b"".join(streamed.streaming_content), buffered.content)
+
+            hit = self.client.get(reverse("products-list"))
+            self.assertEqual(hit["X-Cache"], "HIT")
+            self.assertEqual(hit.content, buffered.content)
+
+    def test_streamed_lists_over_the_cap_are_not_cached(self):
+        with override_settings(STREAMING_LIST_CHUNK_SIZE=2, CATALOG_CACHE_MAX_BYTES=100):
+            streamed = self.client.get(reverse("products-list"))
+            self.assertTrue(streamed.streaming)
+            body = b"".join(streamed.streaming_content)
+            self.assertGreater(len(body), 100)
+            again = self.client.get(reverse("products-list"))
+            self.assertEqual(again["X-Cache"], "MISS")
+            self.assertEqual(b"".join(again.streaming_content), body)
+
+
+class FastJSONRendererTest(TestCase):
+
+    def _payload(self):
+        return {
+            "price": "19.90",
+            "old": Decimal("24.90"),
+            "at": datetime(2024, 5, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+            "naive": datetime(2024, 5, 1, 12, 30),
+            "day": date(2024, 5, 1),
+            "uuid": UUID(int=1),
+            "label": gettext_lazy("Crème"),
+            "sep": "a\u2028b",
+            1: [None, True, 1.5, 10 ** 30],
+        }
+
+    def test_same_bytes_as_drf_renderer(self):
+        data = self._payload()
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+
+    def test_floats_match_repr(self):
+        floats = [1e16, -1.5e16, 1e-7, 0.00001, 2.5e-05, 0.0001, 1e15, 0.1, 1 / 3, 1.7976931348623157e308]
+        for data in (floats, {"x": 1e-7}, 1e16, {"s": "x,1e5"}):
+            self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_finite_floats_render_as_null(self):
+        # documented difference: the strict JSONRenderer raises instead
+        self.assertEqual(renderers.FastJSONRenderer().render([float("nan"), float("inf")]), b"[null,null]")
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float("nan")])
+
+    def test_stdlib_fallback_and_parser(self):
+        data = self._payload()
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+        parsed = renderers.FastJSONParser().parse(io.BytesIO('{"a": "é", "big": 18446744073709551616}'.encode()))
+        self.assertEqual(parsed, {"a": "é", "big": 2 ** 64})
+        with self.assertRaises(ParseError):
+            renderers.FastJSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+
+
+class PriceFilterSortTest(TestCase):
+
+    def setUp(self):
+        self.cheap = Product.objects.create(name="Balm", price=30, stock=True)
+        self.promo = Product.objects.create(name="Cream", price=200, new_price=90, stock=True)
+        self.ranged = Product.objects.create(name="Argan oil", price=150, stock=True)
+        ProductVariant.objects.create(product=self.ranged, label="30 ml", size_ml=30, price=60)
+        ProductVariant.objects.create(product=self.ranged, label="100 ml", size_ml=100, price=150)
+
+    def _ids(self, **params):
+        return [p["id"] for p in self.client.get(reverse("products-list"), params).json()]
+
+    def test_effective_and_variant_prices(self):
+        self.ranged.refresh_from_db()
+        self.assertEqual((self.ranged.variant_min_price, self.ranged.variant_max_price), (60, 150))
+        # promo counts, not the crossed-out price; the 30 ml variant is in range
+        self.assertEqual(
+            set(self._ids(min_price="50", max_price="100")), {self.promo.id, self.ranged.id}
+        )
+        self.assertEqual(self._ids(max_price="40"), [self.cheap.id])
+        self.assertEqual(self._ids(min_price="160"), [])
+
+        ProductVariant.objects.filter(product=self.ranged).delete()
+        self.ranged.sync_promo()
+        self.assertEqual(self._ids(min_price="50", max_price="100"), [self.promo.id])
+
+    def test_range_between_variant_prices_does_not_match(self):
+        gap = Product.objects.create(name="Kit", price=500, stock=True)
+        ProductVariant.objects.create(product=gap, label="Mini", size_ml=10, price=10)
+        ProductVariant.objects.create(product=gap, label="Maxi", size_ml=200, price=100)
+        self.assertNotIn(gap.id, self._ids(min_price="40", max_price="55"))
+        self.assertIn(gap.id, self._ids(min_price="5", max_price="15"))
+
+    def test_orderings_and_cursor(self):
+        self.assertEqual(self._ids(ordering="price"), [self.cheap.id, self.promo.id, self.ranged.id])
+        self.assertEqual(self._ids(ordering="-price"), [self.ranged.id, self.promo.id, self.cheap.id])
+        self.assertEqual(self._ids(ordering="name"), [self.ranged.id, self.cheap.id, self.promo.id])
+        self.assertEqual(self._ids(ordering="newest"), [self.ranged.id, self.promo.id, self.cheap.id])
+
+        page = self.client.get(reverse("products-list"), {"ordering": "price", "limit": 2}).json()
+        self.assertEqual([p["id"] for p in page["results"]], [self.cheap.id, self.promo.id])
+        page = self.client.get(
+            reverse("products-list"), {"ordering": "price", "limit": 2, "after": page["next"]}
+        ).json()
+        self.assertEqual([p["id"] for p in page["results"]], [self.ranged.id])
+
+
+class ProductSuggestTest(TestCase):
+
+    def setUp(self):
+        self.creme = Product.objects.create(name="Crème hydratante", brand="Avène", price=120, stock=True)
+        self.cleanser = Product.objects.create(name="Gel nettoyant crème", brand="Avène", price=90, stock=True)
+        Product.objects.create(name="Huile sèche", brand="Nuxe", price=200, stock=True)
+
+    def _names(self, q):
+        return [h["name"] for h in self.client.get(reverse("products-suggest"), {"q": q}).json()]
+
+    def test_folded_prefixes_and_warm_path(self):
+        self.assertEqual(self._names("CREM"), ["Crème hydratante", "Gel nettoyant crème"])
+        self.assertEqual(self._names("aven hyd"), ["Crème hydratante"])
+        self.assertEqual(self._names("xyz"), [])
+        hit = self.client.get(reverse("products-suggest"), {"q": "nux"}).json()[0]
+        self.assertEqual(set(hit), {"id", "name", "brand", "image_thumb"})
+        with self.assertNumQueries(0):
+            self._names("huile")
+
+    def test_rebuilt_after_writes(self):
+        self._names("crem")
+        self.creme.name = "Baume réparateur"
+        self.creme.save()
+        self.assertEqual(self._names("crem"), ["Gel nettoyant crème"])
+        Product.objects.filter(pk=self.cleanser.pk).update(name="Gel nettoyant")
+        self.assertEqual(self._names("crem"), [])
+        self.assertEqual(self._names("repa"), ["Baume réparateur"])
+
+
+    def test_other_workers_rebuild_after_timeout(self):
+        # a worker on a per-process cache never sees the version bump of a write
+        with mock.patch("product.suggest.catalog_version", return_value=-1):
+            self.assertEqual([h["name"] for h in suggest("huile")], ["Huile sèche"])
+            Product.objects.create(name="Huile de rose", brand="Nuxe", price=150, stock=True)
+            self.assertEqual(len(suggest("huile")), 1)
+            later = time.monotonic() + 3600
+            with mock.patch("product.cache.time.monotonic", return_value=later):
+                self.assertEqual(len(suggest("huile")), 2)
+
+class SimilarProductsTest(TestCase):
+
+    def setUp(self):
+        self.serum = Product.objects.create(name="Serum", brand="Nuxe", category="face", price=100, stock=True)
+        self.twin = Product.objects.create(name="Serum bis", brand="Nuxe", category="face", price=95, stock=True)
+        self.far = Product.objects.create(name="Toner", brand="Avene", category="face", price=20, stock=True)
+        self.bought = Product.objects.create(name="Shampoo", brand="Klorane", category="hair", price=60, stock=True)
+        Product.objects.create(name="Mascara", brand="Maybelline", category="eyes", price=80, stock=True)
+        OrderModel.objects.create(
+            name="x", items=[{"id": self.serum.id, "qty": 1}, {"id": self.bought.id, "qty": 2}]
+        )
+
+    def test_scores_and_single_query_endpoint(self):
+        call_command("build_similar_products", stdout=io.StringIO())
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse("product-similar", args=[self.serum.id])).json()
+        self.assertEqual([p["id"] for p in data], [self.twin.id, self.far.id, self.bought.id])
+        self.assertNotIn("variants", data[0])
+
+    def test_incremental_rebuild(self):
+        call_command("build_similar_products", stdout=io.StringIO())
+        out = io.StringIO()
+        call_command("build_similar_products", stdout=out)
+        self.assertIn("for 1 products", out.getvalue())  # only Mascara: no candidates, never built
+
+        self.far.price = 99
+        self.far.save()
+        call_command("build_similar_products", stdout=io.StringIO())
+        self.assertEqual(
+            SimilarProduct.objects.get(product=self.far, rank=0).similar_id, self.serum.id
+        )
+
+
+class WishlistToggleTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="buyer1234")
+        self.client.force_authenticate(self.user)
+        self.lipstick = Product.objects.create(name="Lipstick", price=50, stock=True)
+        self.gloss = Product.objects.create(name="Gloss", price=40, stock=True)
+        WishlistItem.objects.create(user=self.user, product=self.gloss)  # before any counter
+
+    def _toggle(self, pid):
+        return self.client.post(reverse("wishlist-toggle"), {"product_id": pid}, format="json")
+
+    def test_toggle_and_counter(self):
+        res = self._toggle(self.lipstick.id)
+        self.assertEqual(res.data, {"state": "added", "total": 2})
+        self.assertEqual(self._toggle(self.lipstick.id).data, {"state": "removed", "total": 1})
+        self.assertEqual(self._toggle(self.lipstick.id).data["total"], 2)
+        self.assertEqual(self._toggle(999).status_code, 404)
+
+        # cascades and the other wishlist endpoints keep the counter exact
+        self.gloss.delete()
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 1)
+        item = WishlistItem.objects.get(user=self.user)
+        self.assertEqual(self.client.delete(reverse("wishlist-delete", args=[item.id])).status_code, 204)
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 0)
+        self.client.post(reverse("wishlist-list-create"), {"product_id": self.lipstick.id}, format="json")
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 1)
+
+    def test_direct_writes_and_reconcile(self):
+        self._toggle(self.lipstick.id)  # seeds the counter: 2
+        # admin-style writes go through the post_save/post_delete receivers
+        WishlistItem.objects.filter(user=self.user, product=self.gloss).delete()
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 1)
+        WishlistItem.objects.create(user=self.user, product=self.gloss)
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 2)
+
+        WishlistCount.objects.filter(user=self.user).update(count=7)
+        call_command("reconcile_wishlist_counts", stdout=io.StringIO())
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 2)
+
+        self.user.delete()  # cascades through the receivers without resurrecting the counter
+        self.assertFalse(WishlistCount.objects.exists())
+
+    def test_remove_moves_counter_by_deleted_rows(self):
+        self._toggle(self.lipstick.id)  # seeds the counter: 2
+        signalled = []
+        receiver = lambda sender, **kwargs: signalled.append(kwargs["instance"])  # noqa: E731
+        post_delete.connect(receiver, sender=WishlistItem)
+        try:
+            self.assertEqual(WishlistItem.objects.remove(self.user.id, product_id=self.gloss.id), 1)
+            self.assertEqual(WishlistItem.objects.remove(self.user.id, product_id=self.gloss.id), 0)
+        finally:
+            post_delete.disconnect(receiver, sender=WishlistItem)
+        self.assertEqual(signalled, [])  # no per-row signal to double count
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 1)
+
+    def test_no_count_scan_once_seeded(self):
+        self._toggle(self.lipstick.id)
+        with CaptureQueriesContext(connection) as ctx:
+            self._toggle(self.lipstick.id)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
+
+
+class WishlistPayloadTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="buyer1234")
+        self.client.force_authenticate(self.user)
+        self.products = []
+        for i in range(3):
+            p = Product.objects.create(name=f"Palette {i}", price=100, new_price=80, stock=True)
+            ProductVariant.objects.create(product=p, label="S", size_ml=10, price=50)
+            ProductVariant.objects.create(product=p, label="L", size_ml=30, price=120)
+            WishlistItem.objects.create(user=self.user, product=p)
+            self.products.append(p)
+
+    def test_ids_with_etag(self):
+        url = reverse("wishlist-ids")
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+        self.assertEqual(res.json(), sorted(p.id for p in self.products))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"]).status_code, 304)
+        self.client.post(reverse("wishlist-toggle"), {"product_id": self.products[0].id}, format="json")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"]).status_code, 200)
+
+    def test_listing_prefetches_variants(self):
+        # ETag aggregate + items/products + variants
+        with self.assertNumQueries(3):
+            data = self.client.get(reverse("wishlist-list-create")).json()
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[0]["product"]["promo_variant_old_price"], 120)
+
+
+class WishlistMergeTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="buyer1234")
+        self.client.force_authenticate(self.user)
+        self.products = [Product.objects.create(name=f"Blush {i}", price=30, stock=True) for i in range(4)]
+        WishlistItem.objects.create(user=self.user, product=self.products[0])
+
+    def test_merge_in_one_insert(self):
+        ids = [p.id for p in self.products] + [999]
+        res = self.client.post(reverse("wishlist-merge"), {"product_ids": ids}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["missing"], [999])
+        self.assertEqual({i["product"]["id"] for i in res.data["items"]}, set(ids[:-1]))
+        self.assertEqual(WishlistCount.objects.get(user=self.user).count, 4)
+
+        # replaying is harmless
+        res = self.client.post(reverse("wishlist-merge"), {"product_ids": ids}, format="json")
+        self.assertEqual(len(res.data["items"]), 4)
+
+    def test_rejects_malformed_or_oversized(self):
+        url = reverse("wishlist-merge")
+        self.assertEqual(self.client.post(url, {"product_ids": ["x"]}, format="json").status_code, 400)
+        self.assertEqual(
+            self.client.post(url, {"product_ids": list(range(1, 600))}, format="json").status_code, 400
+        )
+        self.assertEqual(self.client.post(url, [1, 2], format="json").status_code, 400)
+
+
+class ShippingRateServiceTest(TestCase):
+
+    def setUp(self):
+        ShippingRate.objects.create(city="Fès", price=30)
+        ShippingRate.objects.create(city="Casablanca", price=20)
+        ShippingRate.objects.create(city="Tanger", price=45, active=False)
+
+    def test_normalized_lookup_and_warm_path(self):
+        self.assertEqual(shipping_price("  FES "), Decimal("30"))
+        self.assertIsNone(shipping_price("Tanger"))  # inactive
+        with self.assertNumQueries(0):
+            self.assertEqual(shipping_price("casablanca"), Decimal("20"))
+            self.assertEqual([r.city for r in shipping_rates().search("CASA")], ["Casablanca"])
+        with self.assertRaises(TypeError):
+            shipping_rates().prices["x"] = 1
+
+    def test_writes_invalidate_and_endpoints_share_it(self):
+        shipping_price("fes")
+        ShippingRate.objects.filter(city="Fès").update(price=35)
+        self.assertEqual(shipping_price("fès"), Decimal("35"))
+
+        public = self.client.get(reverse("shipping-rates-public"), {"city": "fes"}).json()
+        self.assertEqual([r["city"] for r in public], ["Fès"])
+        payments = self.client.get(reverse("shipping-rates")).json()
+        self.assertEqual([r["city"] for r in payments], ["Casablanca", "Fès"])
+        self.assertIn("updated_at", payments[0])
+
+    def test_other_workers_reload_after_timeout(self):
+        # a worker on a per-process cache never sees the version bump of a write
+        with mock.patch("product.shipping.catalog_version", return_value=-1):
+            self.assertEqual(shipping_price("fes"), Decimal("30"))
+            ShippingRate.objects.filter(city="Fès").update(price=35)
+            self.assertEqual(shipping_price("fes"), Decimal("30"))
+            later = time.monotonic() + 3600
+            with mock.patch("product.cache.time.monotonic", return_value=later):
+                self.assertEqual(shipping_price("fes"), Decimal("35"))
+
+
+class CheckoutQuoteTest(TestCase):
+
+    def setUp(self):
+        ShippingRate.objects.create(city="Fès", price=30)
+        self.serum = Product.objects.create(name="Serum", price=100, new_price=80, stock=True)
+        self.small = ProductVariant.objects.create(product=self.serum, label="50 ml", size_ml=50, price=60)
+        self.big = ProductVariant.objects.create(product=self.serum, label="100 ml", size_ml=100, price=120)
+        self.soap = Product.objects.create(name="Soap", price=Decimal("12.50"), stock=True)
+        self.cart = [
+            {"product_id": self.serum.id, "variant_id": self.big.id, "qty": 2},   # promo variant: 96.00
+            {"product_id": self.serum.id, "variant_id": self.small.id, "qty": 1},
+            {"id": self.soap.id, "qty": 3, "price": "0.01"},                     # legacy key, price ignored
+        ]
+
+    def test_quote_prices_cart_in_constant_queries(self):
+        shipping_price("fes")  # warm the rate table
+        with self.assertNumQueries(2):  # products + variants, whatever the cart size
+            q = quote(self.cart, "FES")
+        self.assertEqual([line["unit_price"] for line in q["items"]], [Decimal("96.00"), Decimal("60.00"), Decimal("12.50")])
+        self.assertEqual([line["promo"] for line in q["items"]], [True, False, False])
+        self.assertEqual(q["subtotal"], Decimal("289.50"))
+        self.assertEqual(q["shipping"], Decimal("30.00"))
+        self.assertEqual(q["total"], Decimal("319.50"))
+
+    def test_quote_endpoint(self):
+        data = self.client.post(
+            reverse("checkout-quote"), {"items": self.cart, "city": "Fès"}, content_type="application/json"
+        ).json()
+        self.assertEqual(data["total"], "319.50")
+        self.assertEqual(data["items"][0]["line_total"], "192.00")
+
+        data = self.client.post(reverse("checkout-quote"), {"items": self.cart}, content_type="application/json").json()
+        self.assertIsNone(data["shipping"])
+        self.assertEqual(data["total"], "289.50")
+
+    def test_invalid_carts_are_rejected(self):
+        other = ProductVariant.objects.create(product=self.soap, label="Bar", price=5)
+        for items in (
+            [],
+            [{"product_id": 999999, "qty": 1}],
+            [{"product_id": self.serum.id, "variant_id": other.id, "qty": 1}],
+            [{"product_id": self.serum.id, "qty": 0}],
+            [{"product_id": "abc"}],
+        ):
+            response = self.client.post(reverse("checkout-quote"), {"items": items}, content_type="application/json")
+            self.assertEqual(response.status_code, 400, items)
+        self.assertEqual(
+            self.client.post(reverse("checkout-quote"), self.cart, content_type="application/json").status_code, 400
+        )
+        with self.assertRaises(ValueError):
+            quote(self.cart, "Atlantis", require_shipping=True)
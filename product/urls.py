@@ -4,17 +4,24 @@ from product import views
 urlpatterns = [
     # list/detail
     path("products/", views.ProductsList.as_view(), name="products-list"),
+    path("products/facets/", views.ProductFacetsView.as_view(), name="products-facets"),
+    path("products/batch/", views.ProductBatchView.as_view(), name="products-batch"),
+    path("products/suggest/", views.ProductSuggestView.as_view(), name="products-suggest"),
     path("product/<int:pk>/", views.ProductDetailView.as_view(), name="product-details"),
+    path("product/<int:pk>/similar/", views.ProductSimilarView.as_view(), name="product-similar"),
 
     # create/update/delete
     path("product-create/", views.ProductCreateView.as_view(), name="product-create"),          # legacy
     path("products/create/", views.ProductCreateView.as_view(), name="product-create-alt"),     # ✅ new alias
     path("product-update/<int:pk>/", views.ProductEditView.as_view(), name="product-update"),
     path("product-delete/<int:pk>/", views.ProductDeleteView.as_view(), name="product-delete"),
+    path("products/discount/", views.ProductBulkDiscountView.as_view(), name="products-discount"),
 
     # wishlist
     path("wishlist/", views.WishlistListCreateView.as_view(), name="wishlist-list-create"),
     path("wishlist/toggle/", views.WishlistToggleView.as_view(), name="wishlist-toggle"),
+    path("wishlist/ids/", views.WishlistIdsView.as_view(), name="wishlist-ids"),
+    path("wishlist/merge/", views.WishlistMergeView.as_view(), name="wishlist-merge"),
     path("wishlist/<int:pk>/", views.WishlistDeleteView.as_view(), name="wishlist-delete"),
 
     # product shipping (public admin list in product app)
@@ -22,6 +29,9 @@ urlpatterns = [
     path("admin/shipping-rates/", views.ShippingRatesAdminListCreate.as_view(), name="shipping-rates-admin"),
     path("admin/shipping-rates/<int:pk>/", views.ShippingRateAdminDetail.as_view(), name="shipping-rate-admin-detail"),
 
+    # checkout
+    path("checkout/quote/", views.CheckoutQuoteView.as_view(), name="checkout-quote"),
+
     # brands
     path("brands/", views.BrandsListView.as_view(), name="brands-list"),
 ]
@@ -1,17 +1,32 @@
+import hashlib
 import json
 from decimal import Decimal, InvalidOperation
 
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count
+from django.db.models.functions import Lower
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 
 from rest_framework import status, permissions
+from rest_framework.exceptions import ParseError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from .models import Product, ProductVariant, WishlistItem, ShippingRate
+from my_project.conditional import conditional_on, page_etag
+from my_project.pagination import InvalidCursor, keyset_page, parse_limit
+from my_project.streaming import list_response
+
+from .cache import CatalogCacheMixin
+from .models import Brand, Product, ProductVariant, SimilarProduct, WishlistItem, ShippingRate
+from .pricing import quote
+from .search import search_products
+from .shipping import shipping_rates
+from .suggest import suggest
 from .serializers import (
     ProductSerializer,
+    QuoteSerializer,
     WishlistItemSerializer,
     ShippingRateSerializer,
 )
@@ -29,35 +44,362 @@ def _to_dec(v):
         return None
 
 
+def _filter_products(qs, params):
+    """category/type, brand, on_sale, price range and search filters shared by the product endpoints."""
+    type_param = params.get("type") or params.get("category")
+    if type_param:
+        qs = qs.filter(category=type_param.lower())
+
+    brand = params.get("brand")
+    if brand:
+        # Lower("brand") matches the functional index; brand__iexact would not
+        qs = qs.alias(brand_key=Lower("brand")).filter(brand_key=Brand.normalize(brand))
+
+    if params.get("on_sale") in ("1", "true", "True"):
+        qs = qs.filter(has_discount=True)
+
+    min_price, max_price = _to_dec(params.get("min_price")), _to_dec(params.get("max_price"))
+    if min_price is not None or max_price is not None:
+        qs = qs.price_between(min_price, max_price)
+
+    search = params.get("search")
+    if search:
+        qs = search_products(qs, search)
+    return qs
+
+
+def _parse_variants(raw):
+    """
+    `variants` form/JSON value → cleaned dicts (rows without label or price are
+    skipped, a repeated label keeps its first row). Raises ValueError when
+    the value isn't a JSON list of objects.
+    """
+    try:
+        items = json.loads(raw) if isinstance(raw, str) else raw
+    except ValueError:
+        raise ValueError("variants must be a JSON list")
+    if items is None:
+        return []
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ValueError("variants must be a JSON list")
+
+    out, labels = [], set()
+    for item in items:
+        label = (item.get("label") or "").strip()
+        price = _to_dec(item.get("price"))
+        if not label or price is None or label in labels:
+            continue
+        labels.add(label)
+        try:
+            size_ml = int(item["size_ml"]) if item.get("size_ml") not in ("", None) else None
+        except (TypeError, ValueError):
+            size_ml = None
+        try:
+            vid = int(item["id"]) if item.get("id") not in ("", None) else None
+        except (TypeError, ValueError):
+            vid = None
+        out.append({
+            "id": vid,
+            "label": label,
+            "size_ml": size_ml,
+            "price": price,
+            "in_stock": bool(item.get("in_stock", True)),
+            "sku": (item.get("sku") or "").strip(),
+        })
+    return out
+
+
+_VARIANT_COLUMNS = ("label", "size_ml", "price", "in_stock", "sku")
+
+
+def _sync_variants(product, items):
+    """
+    Diffs `items` (from _parse_variants) against the product's variants:
+    matched by id, then SKU, then label; only changed rows are written.
+    Returns {"inserted": n, "updated": n, "deleted": n}.
+    """
+    existing = list(ProductVariant.objects.filter(product=product))
+    by_id = {v.id: v for v in existing}
+    by_sku = {v.sku: v for v in existing if v.sku}
+    by_label = {v.label: v for v in existing}
+    labels = {v.id: v.label for v in existing}  # as stored, before any rename
+
+    claimed, to_update, to_create = set(), [], []
+    now = timezone.now()
+    for item in items:
+        candidates = (by_id.get(item["id"]), by_sku.get(item["sku"]), by_label.get(item["label"]))
+        match = next((v for v in candidates if v is not None and v.id not in claimed), None)
+        if match is None:
+            fields = {k: item[k] for k in _VARIANT_COLUMNS}
+            to_create.append(ProductVariant(product=product, **fields))
+            continue
+        claimed.add(match.id)
+        if any(getattr(match, k) != item[k] for k in _VARIANT_COLUMNS):
+            for k in _VARIANT_COLUMNS:
+                setattr(match, k, item[k])
+            match.updated_at = now  # auto_now doesn't apply to bulk_update
+            to_update.append(match)
+
+    stale = [v.id for v in existing if v.id not in claimed]
+    # deletes first, then updates: a new row may reuse a removed/renamed label
+    if stale:
+        ProductVariant.objects.filter(id__in=stale).delete()
+    renamed = [v for v in to_update if v.label != labels[v.id]]
+    kept_labels = {labels[pk] for pk in claimed}
+    if any(v.label in kept_labels for v in renamed):
+        # swapped/rotated labels: park the renamed rows on unique placeholders so
+        # the bulk_update below never collides with unique_together(product, label)
+        parked = [ProductVariant(id=v.id, label=f"~{v.id}") for v in renamed]
+        ProductVariant.objects.bulk_update(parked, ["label"])
+    if to_update:
+        ProductVariant.objects.bulk_update(to_update, [*_VARIANT_COLUMNS, "updated_at"])
+    if to_create:
+        ProductVariant.objects.bulk_create(to_create)
+    return {"inserted": len(to_create), "updated": len(to_update), "deleted": len(stale)}
+
+
+def _body(request):
+    """request.data as a dict; 400 for a JSON array/scalar body."""
+    if not isinstance(request.data, dict):
+        raise ParseError("Expected a JSON object.")
+    return request.data
+
+
+BATCH_MAX_IDS = 200
+
+
+def _parse_ids(raw, maximum=BATCH_MAX_IDS):
+    """'3,1,3' or [3, 1, 3] → [3, 1] (order kept, duplicates dropped); 400 if malformed."""
+    if isinstance(raw, str):
+        raw = [p for p in raw.split(",") if p.strip()]
+    try:
+        ids = list(dict.fromkeys(int(p) for p in raw or []))
+    except (TypeError, ValueError):
+        raise ParseError("ids must be a comma-separated list of product ids")
+    if len(ids) > maximum:
+        raise ParseError(f"At most {maximum} ids per request.")
+    return ids
+
+
+# serializer fields that need the variants prefetch
+_VARIANT_FIELDS = {"variants", "promo_variant_id", "promo_variant_old_price"}
+# serializer fields backed by a differently named column
+_FIELD_COLUMNS = {"images": {"image", "image_derivatives"}}
+
+
+def _product_fieldset(params):
+    """
+    ?fields=id,name,price,image&include=variants → (field names, prefetch variants?).
+    Without ?fields the full representation is returned, variants included.
+    """
+    raw = params.get("fields")
+    if not raw:
+        return None, True
+    fields = {f.strip() for f in raw.split(",") if f.strip()} | {"id"}
+    include = {f.strip() for f in (params.get("include") or "").split(",")}
+    if "variants" in include:
+        fields.add("variants")
+    return fields, bool(fields & _VARIANT_FIELDS)
+
+
+def _product_queryset(fields, with_variants, ordering=()):
+    """Base queryset loading only the columns the fieldset (and ordering) needs."""
+    qs = Product.objects.catalog() if with_variants else Product.objects.all()
+    if fields is None:
+        return qs
+    columns = {f.name for f in Product._meta.concrete_fields}
+    # id and updated_at: keyset cursors and page ETags
+    needed = (fields & columns) | {"id", "updated_at"} | {k.lstrip("-") for k in ordering if k.lstrip("-") in columns}
+    for f in fields & _FIELD_COLUMNS.keys():
+        needed |= _FIELD_COLUMNS[f]
+    if with_variants:
+        needed.add("has_discount")  # promo_variant reads it
+    return qs.only(*needed)
+
+
 # ======================= PRODUCTS =======================
 
-class ProductsList(APIView):
+def _products_page_limit(params):
+    """?limit= (default 24 once ?after= is given) → page size, or None for the plain list."""
+    return parse_limit(params.get("limit") or ("24" if params.get("after") else None))
+
+
+class ProductsList(CatalogCacheMixin, APIView):
+    """
+    GET /api/products/?category=&brand=&search=   (search results ranked by relevance)
+    Price: ?min_price=&max_price=, ?ordering=price|-price|newest|name
+    Promos: ?on_sale=1, ?ordering=-discount_percent
+    Cursor mode (opt-in): ?limit=24&after=<next> → {"results": [...], "next": "<cursor>"|null};
+    a page's ETag hashes its own rows
+    Sparse rows: ?fields=id,name,price,image[&include=variants]
+    """
     permission_classes = [permissions.AllowAny]
+    ordering = ("-id",)
+    # ?ordering= values → indexed sort keys (last key unique, for cursors)
+    orderings = {
+        "-discount_percent": ("-discount_percent", "-id"),
+        "price": ("effective_price", "id"),
+        "-price": ("-effective_price", "-id"),
+        "newest": ("-id",),
+        "name": ("name", "id"),
+    }
+
+    @conditional_on(
+        lambda request: None if _products_page_limit(request.query_params)
+        else _filter_products(Product.objects.all(), request.query_params)
+    )
+    def get(self, request):
+        ordering = self.orderings.get(request.query_params.get("ordering"))
+        if request.query_params.get("search"):
+            ordering = ordering or ("-search_rank",) + self.ordering
+        ordering = ordering or self.ordering
+
+        fields, with_variants = _product_fieldset(request.query_params)
+        qs = _filter_products(_product_queryset(fields, with_variants, ordering), request.query_params)
+
+        limit = _products_page_limit(request.query_params)
+        if limit is None:
+            return list_response(request, qs.order_by(*ordering), ProductSerializer, fields=fields)
+
+        try:
+            rows, next_cursor = keyset_page(qs, ordering, limit, request.query_params.get("after"))
+        except InvalidCursor:
+            return Response({"detail": "Invalid cursor."}, status=400)
+        # the page validates its own rows: no aggregate over the whole filtered catalog
+        etag = page_etag(rows, next_cursor)
+        response = get_conditional_response(request, etag=etag) or Response(
+            {"results": ProductSerializer(rows, many=True, fields=fields).data, "next": next_cursor},
+            status=200,
+        )
+        response["ETag"] = etag
+        return response
+
 
+class ProductFacetsView(CatalogCacheMixin, APIView):
+    """
+    GET /api/products/facets/?category=&brand=&search=&on_sale=
+    Sidebar counts under the current filters, from one GROUP BY query:
+    {"total", "category": [...], "brand": [...], "in_stock": {...}, "on_sale": {...}}
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @conditional_on(lambda request: _filter_products(Product.objects.all(), request.query_params))
     def get(self, request):
-        qs = Product.objects.all().order_by("-id")
+        qs = _filter_products(Product.objects.all(), request.query_params)
+        groups = (
+            qs.order_by()
+            .values("category", "brand", "stock", "has_discount")
+            .annotate(n=Count("id"))
+        )
+
+        total = 0
+        categories, brands = {}, {}
+        in_stock = {"true": 0, "false": 0}
+        on_sale = {"true": 0, "false": 0}
+        for g in groups:
+            n = g["n"]
+            total += n
+            categories[g["category"]] = categories.get(g["category"], 0) + n
+            if g["brand"]:
+                # brands differing only by case are one facet
+                key = g["brand"].casefold()
+                label, count = brands.get(key, (g["brand"], 0))
+                brands[key] = (label, count + n)
+            in_stock["true" if g["stock"] else "false"] += n
+            on_sale["true" if g["has_discount"] else "false"] += n
+
+        labels = dict(Product.Category.choices)
+        return Response(
+            {
+                "total": total,
+                "category": [
+                    {"value": c, "label": labels.get(c, c), "count": n}
+                    for c, n in sorted(categories.items(), key=lambda kv: (-kv[1], kv[0]))
+                ],
+                "brand": [
+                    {"value": label, "count": n}
+                    for label, n in sorted(brands.values(), key=lambda b: b[0].casefold())
+                ],
+                "in_stock": in_stock,
+                "on_sale": on_sale,
+            },
+            status=200,
+        )
 
-        type_param = request.query_params.get("type") or request.query_params.get("category")
-        if type_param:
-            qs = qs.filter(category=type_param.lower())
 
-        brand = request.query_params.get("brand")
-        if brand:
-            qs = qs.filter(brand__iexact=brand)
+class ProductBatchView(CatalogCacheMixin, APIView):
+    """
+    GET  /api/products/batch/?ids=3,1,2[&fields=...]
+    POST /api/products/batch/  {"ids": [3, 1, 2]}   (long lists)
+    → {"results": [...in requested order], "missing": [ids not found]}
+    Same representation (and ?fields/?include) as ProductDetailView.
+    """
+    permission_classes = [permissions.AllowAny]
 
-        search = request.query_params.get("search")
-        if search:
-            qs = qs.filter(Q(name__icontains=search) | Q(description__icontains=search))
+    @conditional_on(lambda request: Product.objects.filter(id__in=_parse_ids(request.query_params.get("ids"))))
+    def get(self, request):
+        return self._batch(request.query_params.get("ids"), request.query_params)
 
-        return Response(ProductSerializer(qs, many=True).data, status=200)
+    def post(self, request):
+        return self._batch(_body(request).get("ids"), request.query_params)
+
+    def _batch(self, raw, params):
+        ids = _parse_ids(raw)
+        fields, with_variants = _product_fieldset(params)
+        found = {p.id: p for p in _product_queryset(fields, with_variants).filter(id__in=ids)}
+        return Response(
+            {
+                "results": ProductSerializer(
+                    [found[i] for i in ids if i in found], many=True, fields=fields
+                ).data,
+                "missing": [i for i in ids if i not in found],
+            },
+            status=200,
+        )
 
 
-class ProductDetailView(APIView):
+class ProductSuggestView(APIView):
+    """
+    GET /api/products/suggest/?q=crè hyd
+    → up to 10 [{id, name, brand, image_thumb}] whose name/brand words start
+    with every query word (accent-insensitive). Served from product/suggest.py.
+    """
     permission_classes = [permissions.AllowAny]
 
+    def get(self, request):
+        return Response(suggest(request.query_params.get("q") or ""), status=200)
+
+
+class ProductDetailView(CatalogCacheMixin, APIView):
+    permission_classes = [permissions.AllowAny]
+
+    @conditional_on(lambda request, pk: Product.objects.filter(id=pk), last_modified=True)
     def get(self, request, pk):
-        product = get_object_or_404(Product, id=pk)
-        return Response(ProductSerializer(product).data, status=200)
+        fields, with_variants = _product_fieldset(request.query_params)
+        product = get_object_or_404(_product_queryset(fields, with_variants), id=pk)
+        return Response(ProductSerializer(product, fields=fields).data, status=200)
+
+
+class ProductSimilarView(CatalogCacheMixin, APIView):
+    """
+    GET /api/product/<pk>/similar/  → precomputed similar products, best first
+    (see product/similar.py), as slim product rows.
+    """
+    permission_classes = [permissions.AllowAny]
+    fields = {
+        "id", "name", "brand", "category", "price", "new_price", "stock",
+        "image", "images", "has_discount", "discount_percent",
+    }
+
+    def get(self, request, pk):
+        # one query: the (product, rank) index joined to the similar products
+        entries = (
+            SimilarProduct.objects.filter(product_id=pk)
+            .select_related("similar")
+            .order_by("rank")
+        )
+        products = [e.similar for e in entries]
+        return Response(ProductSerializer(products, many=True, fields=self.fields).data, status=200)
 
 
 class ProductCreateView(APIView):
@@ -88,27 +430,14 @@ class ProductCreateView(APIView):
         raw = data.get("variants")
         if raw:
             try:
-                items = json.loads(raw) if isinstance(raw, str) else raw
-                to_create = []
-                for item in items or []:
-                    label = (item.get("label") or "").strip()
-                    price = _to_dec(item.get("price"))
-                    if not label or price is None:
-                        continue
-                    to_create.append(
-                        ProductVariant(
-                            product=product,
-                            label=label,
-                            size_ml=item.get("size_ml") if item.get("size_ml") not in ("", None) else None,
-                            price=price,
-                            in_stock=bool(item.get("in_stock", True)),
-                            sku=(item.get("sku") or "").strip(),
-                        )
-                    )
-                if to_create:
-                    ProductVariant.objects.bulk_create(to_create)
-            except Exception:
-                pass
+                items = _parse_variants(raw)
+            except ValueError:
+                items = []
+            if items:
+                ProductVariant.objects.bulk_create(
+                    [ProductVariant(product=product, **{k: i[k] for k in _VARIANT_COLUMNS}) for i in items]
+                )
+            product.sync_promo()  # bulk_create skips the variant signals
 
         return Response(ProductSerializer(product).data, status=201)
 
@@ -117,6 +446,8 @@ class ProductEditView(APIView):
     """
     PUT /api/product-update/<pk>/
     Comma/dot decimals accepted; empty new_price clears promo.
+    `variants` is diffed against the stored rows (matched by id, SKU, then
+    label) and the response adds {"variant_changes": {inserted, updated, deleted}}.
     """
     permission_classes = [permissions.IsAdminUser]
 
@@ -142,39 +473,52 @@ class ProductEditView(APIView):
         if image_file is not None:
             payload["image"] = image_file
 
+        variants = None
+        if "variants" in data:
+            try:
+                variants = _parse_variants(data.get("variants"))
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=400)
+
         ser = ProductSerializer(instance=product, data=payload, partial=True)
         if not ser.is_valid():
             return Response({"detail": ser.errors}, status=400)
 
         product = ser.save()
 
-        if "variants" in data:
-            ProductVariant.objects.filter(product=product).delete()
-            raw = data.get("variants")
-            try:
-                items = json.loads(raw) if isinstance(raw, str) else raw
-                to_create = []
-                for item in items or []:
-                    label = (item.get("label") or "").strip()
-                    price = _to_dec(item.get("price"))
-                    if not label or price is None:
-                        continue
-                    to_create.append(
-                        ProductVariant(
-                            product=product,
-                            label=label,
-                            size_ml=item.get("size_ml") if item.get("size_ml") not in ("", None) else None,
-                            price=price,
-                            in_stock=bool(item.get("in_stock", True)),
-                            sku=(item.get("sku") or "").strip(),
-                        )
-                    )
-                if to_create:
-                    ProductVariant.objects.bulk_create(to_create)
-            except Exception:
-                pass
-
-        return Response(ProductSerializer(product).data, status=200)
+        if variants is None:
+            return Response(ProductSerializer(product).data, status=200)
+
+        changes = _sync_variants(product, variants)
+        product.sync_promo()  # bulk writes skip the variant signals
+        return Response({**ProductSerializer(product).data, "variant_changes": changes}, status=200)
+
+
+class ProductBulkDiscountView(APIView):
+    """
+    POST /api/products/discount/  {"percent": 20, "brand": "...", "category": "..."}
+    Applies the discount to every product of the brand and/or category in one
+    UPDATE; "percent": 0 or null clears it. → {"updated": n}
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        brand = (request.data.get("brand") or "").strip()
+        category = (request.data.get("category") or "").strip()
+        if not brand and not category:
+            return Response({"detail": "brand or category required"}, status=400)
+
+        raw = request.data.get("percent")
+        try:
+            pct = int(raw) if raw not in (None, "") else 0
+        except (TypeError, ValueError):
+            pct = -1
+        if not 0 <= pct <= 99:
+            return Response({"detail": "percent must be an integer between 0 and 99"}, status=400)
+
+        qs = _filter_products(Product.objects.all(), {"brand": brand, "category": category})
+        updated = qs.apply_discount(pct) if pct else qs.clear_discount()
+        return Response({"updated": updated, "percent": pct}, status=200)
 
 
 class ProductDeleteView(APIView):
@@ -188,12 +532,23 @@ class ProductDeleteView(APIView):
 
 # ======================= WISHLIST / SHIPPING / BRANDS (unchanged) =======================
 
+def _wishlist_items(user):
+    # variants in one extra query; promo_variant is cached per product
+    return (
+        WishlistItem.objects.filter(user=user)
+        .select_related("product")
+        .prefetch_related("product__variants")
+    )
+
+
 class WishlistListCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    # items come and go (count, created_at); embedded products change (updated_at)
+    @conditional_on(lambda request: WishlistItem.objects.filter(user=request.user),
+                    "created_at", "product__updated_at")
     def get(self, request):
-        qs = WishlistItem.objects.filter(user=request.user).select_related("product")
-        ser = WishlistItemSerializer(qs, many=True)
+        ser = WishlistItemSerializer(_wishlist_items(request.user), many=True)
         return Response(ser.data, status=200)
 
     def post(self, request):
@@ -201,53 +556,122 @@ class WishlistListCreateView(APIView):
         payload["user"] = request.user.id
         serializer = WishlistItemSerializer(data=payload)
         if serializer.is_valid():
-            obj, created = WishlistItem.objects.get_or_create(
-                user=request.user,
-                product=serializer.validated_data["product"],
-            )
+            product = serializer.validated_data["product"]
+            created = WishlistItem.objects.add(request.user.id, product.id)
+            obj = WishlistItem.objects.select_related("product").get(user=request.user, product=product)
             out = WishlistItemSerializer(obj).data
             return Response(out, status=201 if created else 200)
         return Response({"detail": serializer.errors}, status=400)
 
 
+class WishlistMergeView(APIView):
+    """
+    POST /api/wishlist/merge/ {"product_ids": [...]}   (guest wishlist replayed at login)
+    Unknown ids are skipped and reported; the rest are added in one insert.
+    → {"items": [final wishlist, as GET /api/wishlist/], "missing": [ids]}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_ids = 500
+
+    def post(self, request):
+        ids = _parse_ids(_body(request).get("product_ids"), maximum=self.max_ids)
+        known = set(Product.objects.filter(id__in=ids).values_list("id", flat=True))
+        if known:
+            WishlistItem.objects.merge(request.user.id, [i for i in ids if i in known])
+        return Response(
+            {
+                "items": WishlistItemSerializer(_wishlist_items(request.user), many=True).data,
+                "missing": [i for i in ids if i not in known],
+            },
+            status=200,
+        )
+
+
+class WishlistIdsView(APIView):
+    """
+    GET /api/wishlist/ids/ → [product ids]   (to fill the hearts on listing pages)
+    Read from the (user, product) unique index only; the ETag is a hash of
+    the ids, so a 304 costs that same single query.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        ids = list(
+            WishlistItem.objects.filter(user=request.user)
+            .order_by("product_id")
+            .values_list("product_id", flat=True)
+        )
+        etag = f'W/"{hashlib.md5(",".join(map(str, ids)).encode()).hexdigest()}"'
+        response = get_conditional_response(request, etag=etag) or Response(ids, status=200)
+        response["ETag"] = etag
+        return response
+
+
 class WishlistDeleteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def delete(self, request, pk):
-        item = get_object_or_404(WishlistItem, id=pk, user=request.user)
-        item.delete()
+        if not WishlistItem.objects.remove(request.user.id, id=pk):
+            return Response({"detail": "Not found."}, status=404)
         return Response(status=204)
 
 
 class WishlistToggleView(APIView):
+    """
+    POST /api/wishlist/toggle/ {"product_id"} → {"state": "added"|"removed", "total"}
+    One conditional DELETE/INSERT on the (user, product) pair; `total` comes
+    from the per-user WishlistCount row, not a COUNT(*).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         pid = request.data.get("product_id")
         if not pid:
             return Response({"detail": "product_id required"}, status=400)
-        product = get_object_or_404(Product, id=pid)
-        obj, created = WishlistItem.objects.get_or_create(user=request.user, product=product)
-        if not created:
-            obj.delete()
-            state = "removed"
-        else:
-            state = "added"
-        total = WishlistItem.objects.filter(user=request.user).count()
+        try:
+            pid = int(pid)
+        except (TypeError, ValueError):
+            return Response({"detail": "product_id must be an integer"}, status=400)
+        state, total = WishlistItem.objects.toggle(request.user.id, pid)
+        if state is None:
+            return Response({"detail": "Not found."}, status=404)
         return Response({"state": state, "total": total}, status=200)
 
 
-class ShippingRatesPublicList(APIView):
+class ShippingRatesPublicList(CatalogCacheMixin, APIView):
+    """
+    GET /api/shipping-rates/?q=fes   (accent/case-insensitive, from the in-process rate table)
+    GET /api/shipping-rates/?city=Fès  → the exact city's rate, [] if none
+    """
     permission_classes = [permissions.AllowAny]
     def get(self, request):
-        q = request.query_params.get("q")
-        qs = ShippingRate.objects.filter(active=True)
-        if q:
-            qs = qs.filter(city__icontains=q)
-        ser = ShippingRateSerializer(qs, many=True)
+        table = shipping_rates()
+        city = request.query_params.get("city")
+        if city is not None:
+            rates = [r for r in [table.get(city)] if r is not None]
+        else:
+            rates = table.search(request.query_params.get("q"))
+        ser = ShippingRateSerializer(rates, many=True)
         return Response(ser.data, status=200)
 
 
+class CheckoutQuoteView(APIView):
+    """
+    POST /api/checkout/quote/
+    {"items": [{"product_id": 1, "variant_id": 4, "qty": 2}, ...], "city": "Fès"}
+    → authoritative line prices, subtotal, shipping (null without a city) and total.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        try:
+            data = _body(request)
+            q = quote(data.get("items"), data.get("city"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(QuoteSerializer(q).data, status=200)
+
+
 class ShippingRatesAdminListCreate(APIView):
     permission_classes = [permissions.IsAdminUser]
     def get(self, request):
@@ -255,8 +679,7 @@ class ShippingRatesAdminListCreate(APIView):
         qs = ShippingRate.objects.all()
         if q:
             qs = qs.filter(city__icontains=q)
-        ser = ShippingRateSerializer(qs, many=True)
-        return Response(ser.data, status=200)
+        return list_response(request, qs, ShippingRateSerializer)
 
     def post(self, request):
         ser = ShippingRateSerializer(data=request.data)
@@ -282,14 +705,11 @@ class ShippingRateAdminDetail(APIView):
         return Response(status=204)
 
 
-class BrandsListView(APIView):
+class BrandsListView(CatalogCacheMixin, APIView):
     permission_classes = [permissions.AllowAny]
+
+    @conditional_on(lambda request: Product.objects.all())
     def get(self, request):
-        brands = (
-            Product.objects.exclude(brand="")
-            .values_list("brand", flat=True)
-            .distinct()
-        )
-        sorted_brands = sorted(brands, key=lambda s: s.casefold())
-        return Response(sorted_brands, status=200)
+        # pre-sorted by the unique key index, one row per brand
+        return Response(list(Brand.objects.values_list("name", flat=True)), status=200)
 